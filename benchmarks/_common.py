@@ -0,0 +1,46 @@
+"""基准测试公共工具"""
+
+import importlib
+import sys
+import timeit
+from pathlib import Path
+from types import ModuleType
+from typing import Callable
+
+
+PLUGIN_DIR = Path(__file__).resolve().parents[1]
+
+
+def plugin_module(name: str) -> ModuleType:
+    """
+    以包的形式导入插件内的模块（插件代码使用相对导入，不能直接按文件运行）
+
+    Args:
+        name: 相对于插件目录的模块名，如 "core.keyword_matcher"
+
+    Returns:
+        导入的模块
+    """
+    if str(PLUGIN_DIR.parent) not in sys.path:
+        sys.path.insert(0, str(PLUGIN_DIR.parent))
+    return importlib.import_module(f"{PLUGIN_DIR.name}.{name}")
+
+
+def measure(func: Callable[[], object], number: int = 1000, repeat: int = 5) -> float:
+    """
+    多轮计时，返回最快一轮的单次耗时(秒)
+
+    Args:
+        func: 无参被测函数
+        number: 每轮调用次数
+        repeat: 轮数
+    """
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def report(label: str, seconds: float):
+    """输出单次耗时"""
+    if seconds >= 1e-3:
+        print(f"{label:<40} {seconds * 1e3:10.2f} ms")
+    else:
+        print(f"{label:<40} {seconds * 1e6:10.2f} us")
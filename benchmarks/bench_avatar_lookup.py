@@ -0,0 +1,92 @@
+"""
+头像磁盘缓存查找基准测试
+
+分别在 1 万和 10 万条缓存下测量单次磁盘查找的延迟，并统计每次查找的 stat() 和 open() 调用次数。
+“逐个探测”为原先的方式：对每个可能的扩展名调用 Path.exists()，再读取命中的文件。
+
+运行：python benchmarks/bench_avatar_lookup.py
+"""
+
+import asyncio
+import builtins
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from _common import measure, plugin_module, report
+
+
+SIZES = (10_000, 100_000)
+EXTENSIONS = [".jpg", ".png", ".gif", ".bmp", ".webp"]
+AVATAR = b"\x89PNG\r\n\x1a\n" + b"\0" * 2048
+
+
+def probe_lookup(cache_dir: Path, cache_key: str) -> Optional[bytes]:
+    """原先的查找方式：逐个扩展名探测文件是否存在"""
+    for ext in EXTENSIONS:
+        path = cache_dir / f"{cache_key}{ext}"
+        if path.exists():
+            with open(path, "rb") as f:
+                return f.read()
+    return None
+
+
+def count_syscalls(func: Callable[[], object]) -> Tuple[int, int]:
+    """统计一次调用中的 stat() 和 open() 次数"""
+    counts = {"stat": 0, "open": 0}
+    real_stat, real_open = os.stat, builtins.open
+
+    def counting_stat(*args, **kwargs):
+        counts["stat"] += 1
+        return real_stat(*args, **kwargs)
+
+    def counting_open(*args, **kwargs):
+        counts["open"] += 1
+        return real_open(*args, **kwargs)
+
+    os.stat, builtins.open = counting_stat, counting_open
+    try:
+        func()
+    finally:
+        os.stat, builtins.open = real_stat, real_open
+    return counts["stat"], counts["open"]
+
+
+def populate(cache, entries: int):
+    """直接写入缓存文件和索引，扩展名均为最后探测的 .webp（逐个探测的最坏情况）"""
+    index_module = plugin_module("utils.avatar_index")
+    now = time.time()
+    for user_id in range(entries):
+        cache_key = cache.get_cache_key(str(user_id))
+        with open(cache._cache_file(cache_key, ".webp"), "wb") as f:
+            f.write(AVATAR)
+        cache._index.put(cache_key, index_module.IndexEntry(now, ".webp", len(AVATAR)))
+    cache._index.flush()
+
+
+async def main():
+    avatar_cache_module = plugin_module("utils.avatar_cache")
+    for entries in SIZES:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # 关闭内存层，每次查找都访问磁盘缓存
+            cache = avatar_cache_module.AvatarCache(cache_dir=cache_dir, memory_bytes=0)
+            await cache.start()
+            populate(cache, entries)
+            keys = [cache.get_cache_key(str(random.randrange(entries))) for _ in range(1000)]
+            key_iter = iter(keys * 1000)
+
+            print(f"{entries} 条缓存")
+            report("  索引查找", measure(lambda: cache._get_disk_avatar(next(key_iter)), number=1000))
+            report("  逐个探测（原先）", measure(lambda: probe_lookup(Path(cache_dir), next(key_iter)), number=1000))
+            stats, opens = count_syscalls(lambda: cache._get_disk_avatar(keys[0]))
+            print(f"{'  索引查找的系统调用':<40} stat() {stats} 次，open() {opens} 次")
+            stats, opens = count_syscalls(lambda: probe_lookup(Path(cache_dir), keys[0]))
+            print(f"{'  逐个探测的系统调用':<40} stat() {stats} 次，open() {opens} 次\n")
+            await cache.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+GIF 输出优化基准测试
+
+对动图模板的输出（缺少模板素材时使用合成动图）分别在缩放和不同字节预算下运行 optimize_gif，
+报告耗时、输出大小和帧数，用于权衡大小与耗时。
+
+运行：python benchmarks/bench_gif_output.py
+"""
+
+import io
+import time
+from typing import Dict, Optional
+
+from PIL import Image, ImageDraw, ImageSequence
+from meme_generator import Image as MemeImage, get_meme
+
+from _common import plugin_module, report
+
+
+# 常见的动图模板
+ANIMATED_TEMPLATES = ("petpet", "kiss", "rub", "play", "roll", "shake")
+# (最大边长, 字节预算KB)，预算为0时只缩放和合并重复帧
+SCENARIOS = ((240, 0), (512, 1024), (512, 512), (512, 256))
+
+
+def make_avatar() -> bytes:
+    """生成测试头像"""
+    img = Image.radial_gradient("L").resize((256, 256)).convert("RGB")
+    output = io.BytesIO()
+    img.save(output, format="PNG")
+    return output.getvalue()
+
+
+def render_template(key: str, avatar: bytes) -> Optional[bytes]:
+    """使用模板生成动图，模板不存在或缺少素材时返回None"""
+    try:
+        result = get_meme(key).generate([MemeImage("avatar", avatar)], [], {})
+    except Exception:
+        return None
+    return result if isinstance(result, bytes) else None
+
+
+def make_synthetic_gif(frames: int = 60, size: int = 480) -> bytes:
+    """合成动图：静态背景上移动的小元素，每个画面重复两帧"""
+    background = Image.merge("RGB", (
+        Image.linear_gradient("L").resize((size, size)),
+        Image.radial_gradient("L").resize((size, size)),
+        Image.new("L", (size, size), 128),
+    ))
+    images = []
+    for index in range(frames):
+        frame = background.copy()
+        x = (index // 2) * (size - 40) // frames
+        ImageDraw.Draw(frame).ellipse([x, size // 2, x + 40, size // 2 + 40], fill=(220, 40, 40))
+        images.append(frame)
+    output = io.BytesIO()
+    images[0].save(output, format="GIF", save_all=True, append_images=images[1:], duration=40, loop=0)
+    return output.getvalue()
+
+
+def frame_count(image: bytes) -> int:
+    with Image.open(io.BytesIO(image)) as img:
+        return sum(1 for _ in ImageSequence.Iterator(img))
+
+
+def main():
+    image_utils = plugin_module("utils.image_utils").ImageUtils
+    avatar = make_avatar()
+
+    samples: Dict[str, bytes] = {}
+    for key in ANIMATED_TEMPLATES:
+        data = render_template(key, avatar)
+        if data is not None and data[:3] == b"GIF":
+            samples[key] = data
+    if not samples:
+        print("未能生成模板动图（缺少模板素材），使用合成动图\n")
+    samples["synthetic"] = make_synthetic_gif()
+
+    for name, data in samples.items():
+        with Image.open(io.BytesIO(data)) as img:
+            print(f"{name}: {img.width}x{img.height}，{frame_count(data)} 帧，{len(data)} 字节")
+        for max_size, budget_kb in SCENARIOS:
+            start = time.perf_counter()
+            result = image_utils.optimize_gif(data, max_size, budget_kb * 1024) or data
+            seconds = time.perf_counter() - start
+            label = f"  最大边长 {max_size}" + (f"，预算 {budget_kb} KB" if budget_kb else "")
+            report(label, seconds)
+            print(f"{'':<40} -> {len(result)} 字节，{frame_count(result)} 帧")
+        print()
+
+
+if __name__ == "__main__":
+    main()
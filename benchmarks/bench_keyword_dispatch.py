@@ -0,0 +1,71 @@
+"""
+关键词分发基准测试
+
+对比原先的线性扫描（find_keyword 遍历关键词列表、find_meme 遍历模板并重新读取 meme.info.keywords）
+与注册表分发索引（单次哈希查找）处理每条消息的耗时。
+使用已安装的全部模板（200+），并补充别名关键词到 1000+。
+
+运行：python benchmarks/bench_keyword_dispatch.py
+"""
+
+from typing import List, Optional
+
+from meme_generator import Meme, get_memes
+
+from _common import measure, plugin_module, report
+
+
+# 补充别名后的关键词总数
+TOTAL_KEYWORDS = 1200
+
+
+def linear_find_keyword(keywords: List[str], message_str: str) -> Optional[str]:
+    """原先的 find_keyword：关键词必须等于消息的第一个单词，逐个比较"""
+    words = message_str.split()
+    if not words:
+        return None
+    return next((k for k in keywords if k == words[0]), None)
+
+
+def linear_find_meme(memes: List[Meme], keyword: str) -> Optional[Meme]:
+    """原先的 find_meme：遍历模板，每次跨 FFI 读取关键词"""
+    for meme in memes:
+        if keyword == meme.key or keyword in meme.info.keywords:
+            return meme
+    return None
+
+
+def main():
+    registry_module = plugin_module("core.template_registry")
+    matcher_module = plugin_module("core.keyword_matcher")
+    memes = get_memes()
+    registry = registry_module.TemplateRegistry.build(memes, [], matcher_module.MATCH_MODE_EXACT, 1)
+
+    # 补充别名关键词，分发索引与线性扫描使用相同的关键词集合
+    keywords = list(registry.keywords)
+    dispatch = dict(registry.dispatch)
+    for index in range(TOTAL_KEYWORDS - len(keywords)):
+        alias = f"别名{index}"
+        keywords.append(alias)
+        dispatch[alias] = registry.specs[index % len(registry.specs)]
+    matcher = matcher_module.KeywordMatcher(dispatch, matcher_module.MATCH_MODE_EXACT)
+    print(f"模板数: {len(memes)}，关键词数: {len(keywords)}\n")
+
+    # 命中列表末尾的模板是线性扫描的最坏情况，普通聊天消息不命中任何关键词
+    last_keyword = registry.specs[-1].keywords[0]
+    messages = {
+        "命中（末尾模板）": f"{last_keyword} 你好",
+        "未命中": "今天天气不错，出去走走吧",
+    }
+    for label, message in messages.items():
+        def linear():
+            keyword = linear_find_keyword(keywords, message)
+            if keyword is not None:
+                linear_find_meme(memes, keyword)
+
+        report(f"线性扫描 / {label}", measure(linear, number=200))
+        report(f"分发索引 / {label}", measure(lambda: matcher.match(message), number=100000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+关键词匹配模式基准测试
+
+对比原先的分词后逐个比较、exact 模式（分词后哈希查找）和 prefix 模式（字典树最长前缀匹配）。
+重点是未命中的普通聊天消息：prefix 模式不应比原先的逐个比较更慢，且与 exact 模式相当。
+
+运行：python benchmarks/bench_keyword_matcher.py
+"""
+
+from typing import List, Optional
+
+from meme_generator import get_memes
+
+from _common import measure, plugin_module, report
+
+
+def split_and_compare(keywords: List[str], message_str: str) -> Optional[str]:
+    """原先的匹配方式：关键词必须等于消息的第一个单词，逐个比较"""
+    words = message_str.split()
+    if not words:
+        return None
+    return next((k for k in keywords if k == words[0]), None)
+
+
+def main():
+    registry_module = plugin_module("core.template_registry")
+    matcher_module = plugin_module("core.keyword_matcher")
+    registry = registry_module.TemplateRegistry.build(get_memes(), [], matcher_module.MATCH_MODE_EXACT, 1)
+    keywords = list(registry.keywords)
+    exact = matcher_module.KeywordMatcher(registry.dispatch, matcher_module.MATCH_MODE_EXACT)
+    prefix = matcher_module.KeywordMatcher(registry.dispatch, matcher_module.MATCH_MODE_PREFIX)
+
+    # 首字符与某个关键词相同但不构成关键词的消息，是 prefix 模式未命中时最慢的情况
+    shared_first = next(k for k in keywords if len(k) >= 2)
+    near_miss = shared_first[0] + "随便聊聊"
+    messages = {
+        "未命中（普通聊天）": "今天天气不错，出去走走吧",
+        "未命中（长消息）": "哈" * 500,
+        "未命中（首字相同）": near_miss,
+        "命中（带空格）": f"{shared_first} 你好",
+        "命中（无空格）": f"{shared_first}你好",
+    }
+    print(f"关键词数: {len(keywords)}\n")
+    for label, message in messages.items():
+        baseline = measure(lambda: split_and_compare(keywords, message), number=2000)
+        exact_time = measure(lambda: exact.match(message), number=100000)
+        prefix_time = measure(lambda: prefix.match(message), number=100000)
+        report(f"逐个比较 / {label}", baseline)
+        report(f"exact / {label}", exact_time)
+        report(f"prefix / {label}", prefix_time)
+        print(f"{'prefix 相对逐个比较':<40} {baseline / prefix_time:10.1f} x\n")
+
+
+if __name__ == "__main__":
+    main()
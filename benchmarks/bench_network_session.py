@@ -0,0 +1,80 @@
+"""
+共享 HTTP 会话基准测试
+
+在本地启动一个返回图片的 HTTP 服务，对比原先每次请求新建 ClientSession（新连接池、新连接）
+与 NetworkUtils 共享会话（keep-alive、DNS 缓存）的单次下载延迟。
+本地环境没有 TLS 握手和真实的 DNS 查询，实际网络中节省的时间更多。
+
+运行：python benchmarks/bench_network_session.py
+"""
+
+import asyncio
+import io
+import time
+
+import aiohttp
+from aiohttp import web
+from PIL import Image
+
+from _common import plugin_module, report
+
+
+REQUESTS = 300
+
+
+def make_png() -> bytes:
+    output = io.BytesIO()
+    Image.radial_gradient("L").save(output, format="PNG")
+    return output.getvalue()
+
+
+async def start_stub(body: bytes) -> web.AppRunner:
+    """启动本地图片服务"""
+    async def handler(_request: web.Request) -> web.Response:
+        return web.Response(body=body, content_type="image/png")
+
+    app = web.Application()
+    app.router.add_get("/avatar.png", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner
+
+
+async def download_with_new_session(url: str) -> bytes:
+    """原先的下载方式：每次请求新建会话"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as response:
+            return await response.read()
+
+
+async def timed(func, url: str) -> float:
+    """顺序请求，返回平均单次延迟(秒)"""
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        assert await func(url)
+    return (time.perf_counter() - start) / REQUESTS
+
+
+async def main():
+    network_utils = plugin_module("utils.network_utils").NetworkUtils()
+    runner = await start_stub(make_png())
+    port = runner.addresses[0][1]
+    url = f"http://localhost:{port}/avatar.png"
+    try:
+        # 预热：首次请求的建连和 DNS 解析计入共享会话的初始化成本
+        await network_utils.download_image(url)
+        per_call = await timed(download_with_new_session, url)
+        shared = await timed(network_utils.download_image, url)
+    finally:
+        await network_utils.close()
+        await runner.cleanup()
+
+    print(f"本地服务，顺序请求 {REQUESTS} 次\n")
+    report("每次新建会话", per_call)
+    report("共享会话", shared)
+    report("每个请求节省", per_call - shared)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
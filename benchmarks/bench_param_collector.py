@@ -0,0 +1,108 @@
+"""
+参数收集基准测试（模拟网络延迟）
+
+用固定延迟的桩替代头像下载、图片下载和平台用户信息查询，测量一条包含多个 @ 和一张图片的消息的参数收集耗时。
+“串行”一栏让所有请求依次执行，与原先逐个组件处理时的往返次数相同；“并发”为当前的规划后并发执行。
+
+运行：python benchmarks/bench_param_collector.py
+"""
+
+import asyncio
+import time
+from typing import List, Optional, Tuple
+
+import astrbot.core.message.components as Comp
+
+from _common import plugin_module, report
+
+
+# 单次网络往返的模拟延迟(秒)
+LATENCY = 0.1
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 64
+
+
+class StubNetwork:
+    """固定延迟的网络桩，serial 为 True 时所有请求依次执行"""
+
+    def __init__(self, serial: bool):
+        self.serial = serial
+        self.lock = asyncio.Lock()
+        self.calls = 0
+
+    async def round_trip(self):
+        self.calls += 1
+        if self.serial:
+            async with self.lock:
+                await asyncio.sleep(LATENCY)
+        else:
+            await asyncio.sleep(LATENCY)
+
+    async def get_avatar(self, _user_id: str) -> bytes:
+        await self.round_trip()
+        return PNG
+
+    async def download_image(self, _url: str) -> bytes:
+        await self.round_trip()
+        return PNG
+
+    async def get_user_extra_info(self, _event, target_id: str) -> Tuple[str, str]:
+        await self.round_trip()
+        return f"用户{target_id}", "unknown"
+
+
+class StubEvent:
+    """只提供参数收集用到的接口"""
+
+    def __init__(self, messages: List[Comp.BaseMessageComponent]):
+        self.messages = messages
+
+    def get_messages(self):
+        return self.messages
+
+    def get_sender_id(self) -> str:
+        return "10000"
+
+    def get_self_id(self) -> str:
+        return "20000"
+
+    def get_sender_name(self) -> str:
+        return "发送者"
+
+
+async def collect(serial: bool) -> Tuple[float, int, Optional[tuple]]:
+    """返回 (耗时, 网络请求次数, 收集结果)"""
+    collector_module = plugin_module("core.param_collector")
+    spec_module = plugin_module("core.template_spec")
+    network = StubNetwork(serial)
+    collector_module.PlatformUtils.get_user_extra_info = network.get_user_extra_info
+
+    # 最多 5 张图片、带昵称选项的模板：3 个 @ 加 1 张图片，再用发送者头像补全
+    spec = spec_module.TemplateSpec(
+        "bench", ("测试",), (), 1, 5, 0, 1, (), frozenset({"name"}), frozenset(), None
+    )
+    event = StubEvent([
+        Comp.Plain("测试"),
+        Comp.At(qq="1"),
+        Comp.At(qq="2"),
+        Comp.At(qq="3"),
+        Comp.Image(file="image.png", url="http://127.0.0.1/image.png"),
+    ])
+    collector = collector_module.ParamCollector(network)
+    start = time.perf_counter()
+    result = await collector.collect_params(event, "测试", spec)
+    return time.perf_counter() - start, network.calls, result
+
+
+async def main():
+    serial_time, serial_calls, serial_result = await collect(serial=True)
+    concurrent_time, concurrent_calls, concurrent_result = await collect(serial=False)
+    # 并发执行不改变图片和文字的顺序
+    assert serial_result == concurrent_result
+
+    print(f"模拟延迟 {LATENCY * 1000:.0f} ms，3 个 @ + 1 张图片，网络请求 {concurrent_calls} 次\n")
+    report(f"串行（{serial_calls} 次往返依次执行）", serial_time)
+    report("并发", concurrent_time)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
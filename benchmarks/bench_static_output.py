@@ -0,0 +1,56 @@
+"""
+静态输出图片压缩基准测试
+
+1. 快速路径：尺寸已在限制内时，原先仍会完整重新编码，现在只解析文件头并原样返回。
+2. 字节预算：超出平台大小限制时，依次尝试 PNG 无损优化、降低质量、更换编码格式。
+
+运行：python benchmarks/bench_static_output.py
+"""
+
+import io
+
+from PIL import Image
+
+from _common import measure, plugin_module, report
+
+
+def make_sample(image_format: str, size: int = 480) -> bytes:
+    """生成带渐变和噪点的测试图片（接近照片类表情包的压缩难度）"""
+    gradient = Image.radial_gradient("L").resize((size, size))
+    noise = Image.effect_noise((size, size), 40)
+    img = Image.merge("RGB", (gradient, noise, Image.linear_gradient("L").resize((size, size))))
+    output = io.BytesIO()
+    img.save(output, format=image_format)
+    return output.getvalue()
+
+
+def reencode(image: bytes) -> bytes:
+    """原先的处理方式：无论是否缩放都按原格式重新编码"""
+    img = Image.open(io.BytesIO(image))
+    output = io.BytesIO()
+    img.save(output, format=img.format)
+    return output.getvalue()
+
+
+def main():
+    image_utils = plugin_module("utils.image_utils").ImageUtils
+
+    print("快速路径（尺寸在限制内，无字节预算）")
+    for image_format in ("PNG", "JPEG"):
+        sample = make_sample(image_format)
+        report(f"{image_format} 重新编码（原先）", measure(lambda: reencode(sample), number=20))
+        report(f"{image_format} 原样返回", measure(lambda: image_utils.compress_image(sample, 512), number=2000))
+        print(f"{'':<40} 输入 {len(sample)} 字节，重新编码后 {len(reencode(sample))} 字节")
+
+    print("\n字节预算（PNG 输入）")
+    sample = make_sample("PNG")
+    for budget_kb in (512, 128, 48):
+        target = budget_kb * 1024
+        result = image_utils.compress_image(sample, 512, target)
+        seconds = measure(lambda: image_utils.compress_image(sample, 512, target), number=3, repeat=3)
+        report(f"预算 {budget_kb} KB", seconds)
+        print(f"{'':<40} {len(sample)} -> {len(result)} 字节，格式 {Image.open(io.BytesIO(result)).format}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+模板元数据快照基准测试
+
+模拟一次生成请求在匹配和参数收集阶段读取的模板元数据：
+原先每次都跨 FFI 访问 meme.info / info.params（每次访问都会构造新的 Python 对象），
+现在只读取 TemplateSpec 上的普通属性。
+
+运行：python benchmarks/bench_template_spec.py
+"""
+
+from meme_generator import Meme, get_memes
+
+from _common import measure, plugin_module, report
+
+
+def read_via_ffi(meme: Meme):
+    """原先的读取方式：查找、参数收集各自重新获取 info 和 params"""
+    keywords = meme.info.keywords
+    params = meme.info.params
+    counts = (params.min_images, params.max_images, params.min_texts, params.max_texts)
+    default_texts = meme.info.params.default_texts
+    option_names = {option.name for option in meme.info.params.options}
+    return meme.key, keywords, counts, default_texts, "name" in option_names or "gender" in option_names
+
+
+def read_via_spec(spec):
+    """快照读取方式"""
+    counts = (spec.min_images, spec.max_images, spec.min_texts, spec.max_texts)
+    return spec.key, spec.keywords, counts, spec.default_texts, spec.uses_user_info
+
+
+def main():
+    spec_module = plugin_module("core.template_spec")
+    memes = get_memes()
+    specs = [spec_module.TemplateSpec.from_meme(meme) for meme in memes]
+
+    def all_via_ffi():
+        for meme in memes:
+            read_via_ffi(meme)
+
+    def all_via_spec():
+        for spec in specs:
+            read_via_spec(spec)
+
+    print(f"模板数: {len(memes)}（以下为单个请求的平均耗时）\n")
+    ffi = measure(all_via_ffi, number=20) / len(memes)
+    snapshot = measure(all_via_spec, number=200) / len(memes)
+    report("FFI 读取 meme.info", ffi)
+    report("TemplateSpec 读取", snapshot)
+    report("每个请求节省", ffi - snapshot)
+    report("构建快照（全部模板，每次加载一次）", measure(
+        lambda: [spec_module.TemplateSpec.from_meme(meme) for meme in memes], number=5
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 from astrbot.core import AstrBotConfig
 
 
@@ -16,7 +16,51 @@ class MemeConfig:
         self.cooldown_seconds: int = self.config.get("cooldown_seconds", 3)
         self.enable_avatar_cache: bool = self.config.get("enable_avatar_cache", True)
         self.cache_expire_hours: int = self.config.get("cache_expire_hours", 24)
+        self.avatar_memory_cache_mb: int = self.config.get("avatar_memory_cache_mb", 8)
+        self.avatar_cache_max_mb: int = self.config.get("avatar_cache_max_mb", 256)
+        self.avatar_cache_layout: str = self.config.get("avatar_cache_layout", "flat")
+        self.enable_result_cache: bool = self.config.get("enable_result_cache", True)
+        self.result_cache_memory_mb: int = self.config.get("result_cache_memory_mb", 32)
+        self.result_cache_disk_mb: int = self.config.get("result_cache_disk_mb", 0)
+        self.network_connect_timeout: int = self.config.get("network_connect_timeout", 5)
+        self.network_timeout: int = self.config.get("network_timeout", 15)
+        self.network_limit_per_host: int = self.config.get("network_limit_per_host", 8)
+        self.input_max_size: int = self.config.get("input_max_size", 1024)
+        self.input_max_megapixels: int = self.config.get("input_max_megapixels", 40)
+        self.input_max_frames: int = self.config.get("input_max_frames", 100)
+        self.input_max_total_megapixels: int = self.config.get("input_max_total_megapixels", 200)
+        self.input_max_mb: int = self.config.get("input_max_mb", 20)
+        self.output_size_limits: Dict[str, int] = self._parse_size_limits(self.config.get("output_size_limits", []))
         self.disabled_templates: List[str] = self.config.get("disabled_templates", [])
+        self.keyword_match_mode: str = self.config.get("keyword_match_mode", "exact")
+        self.render_backend: str = self.config.get("render_backend", "thread")
+        self.render_workers: int = self.config.get("render_workers", 2)
+        self.image_workers: int = self.config.get("image_workers", 2)
+        self.max_concurrent_renders: int = self.config.get("max_concurrent_renders", 0)
+        self.max_queued_renders: int = self.config.get("max_queued_renders", 16)
+        self.max_queued_renders_per_group: int = self.config.get("max_queued_renders_per_group", 4)
+        self.overload_reply: str = self.config.get("overload_reply", "")
+
+    @staticmethod
+    def _parse_size_limits(entries: List[str]) -> Dict[str, int]:
+        """解析“平台名:KB”格式的输出大小限制，平台名为 * 时作用于所有平台"""
+        limits: Dict[str, int] = {}
+        for entry in entries:
+            platform, sep, size_kb = str(entry).rpartition(":")
+            if not sep:
+                continue
+            try:
+                limits[platform.strip()] = max(0, int(size_kb.strip())) * 1024
+            except ValueError:
+                continue
+        return limits
+
+    def get_output_size_limit(self, platform_name: str) -> int:
+        """获取指定平台的输出图片字节预算，0 表示不限制"""
+        limit = self.output_size_limits.get(platform_name)
+        if limit is None:
+            limit = self.output_size_limits.get("*", 0)
+        return limit
 
     def save_config(self):
         """保存配置 - 只写入改动的键，避免循环引用"""
@@ -4,5 +4,6 @@ from .meme_manager import MemeManager
 from .param_collector import ParamCollector
 from .image_generator import ImageGenerator
 from .template_manager import TemplateManager
+from .render_scheduler import RenderScheduler, RenderOverloadError
 
-__all__ = ["MemeManager", "ParamCollector", "ImageGenerator", "TemplateManager"]
+__all__ = ["MemeManager", "ParamCollector", "ImageGenerator", "TemplateManager", "RenderScheduler", "RenderOverloadError"]
@@ -1,29 +1,61 @@
 """图片生成模块"""
 
 import asyncio
-from typing import List, Union, Dict
-from meme_generator import (
-    Meme,
-    DeserializeError,
-    ImageAssetMissing,
-    ImageDecodeError,
-    ImageEncodeError,
-    ImageNumberMismatch,
-    MemeFeedback,
-    TextNumberMismatch,
-    TextOverLength,
-)
-from meme_generator import Image as MemeImage
+from typing import Any, Dict, List, Optional, Tuple, Union
+from meme_generator import Meme
 from astrbot.api import logger
 
+from ..render_worker import describe_generate_error, generate_sync
+from ..utils import InstrumentedExecutor
+
+
+# 渲染后端
+RENDER_BACKEND_THREAD = "thread"    # 在专用渲染线程池中调用生成引擎
+RENDER_BACKEND_PROCESS = "process"  # 在预热的子进程中调用生成引擎，超时可强制终止
+RENDER_BACKENDS = (RENDER_BACKEND_THREAD, RENDER_BACKEND_PROCESS)
+
 
 class ImageGenerator:
     """图片生成器"""
 
-    @staticmethod
+    def __init__(self, backend: str = RENDER_BACKEND_THREAD, workers: int = 2):
+        """
+        Args:
+            backend: 渲染后端，thread 或 process
+            workers: 渲染线程数（thread 后端）或工作进程数（process 后端）
+        """
+        self.backend = backend if backend in RENDER_BACKENDS else RENDER_BACKEND_THREAD
+        self.render_pool = None
+        self.executor: Optional[InstrumentedExecutor] = None
+        if self.backend == RENDER_BACKEND_PROCESS:
+            from .render_pool import ProcessRenderPool
+            self.render_pool = ProcessRenderPool(workers)
+        else:
+            # 独立于事件循环默认线程池，渲染与其他阻塞任务互不抢占
+            self.executor = InstrumentedExecutor("meme_render", workers)
+
+    async def start(self):
+        """预热渲染后端"""
+        if self.render_pool:
+            await self.render_pool.start()
+
+    async def close(self):
+        """关闭渲染后端"""
+        if self.render_pool:
+            await self.render_pool.close()
+        if self.executor:
+            self.executor.shutdown()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取渲染后端统计信息"""
+        if self.render_pool:
+            return self.render_pool.get_stats()
+        return {"backend": self.backend, "executor": self.executor.get_stats()}
+
     async def generate_image(
+            self,
             meme: Meme,
-            meme_images: List[MemeImage],
+            images: List[Tuple[str, bytes]],
             texts: List[str],
             options: Dict[str, Union[bool, str, int, float]],
             timeout: int = 30
@@ -33,7 +65,7 @@ class ImageGenerator:
 
         Args:
             meme: 表情包模板
-            meme_images: 图片列表
+            images: 图片列表，元素为 (名称, 图片字节数据)
             texts: 文本列表
             options: 选项参数
             timeout: 超时时间(秒)
@@ -42,52 +74,29 @@ class ImageGenerator:
             生成的图片字节数据
 
         Raises:
-            RuntimeError: 生成失败时抛出
-            asyncio.TimeoutError: 生成超时时抛出
+            RuntimeError: 生成失败或超时时抛出
         """
+        error: Optional[str] = None
         try:
-            # 在线程池中异步执行生成任务，带超时控制
-            result = await asyncio.wait_for(
-                asyncio.to_thread(meme.generate, meme_images, texts, options),
-                timeout=timeout
-            )
+            if self.render_pool:
+                # 在子进程中生成，超时的工作进程会被终止并替换
+                result, error = await asyncio.wait_for(
+                    self.render_pool.submit(meme.key, images, texts, options, timeout),
+                    timeout=timeout
+                )
+            else:
+                # 在渲染线程池中异步执行生成任务，带超时控制
+                result = await asyncio.wait_for(
+                    self.executor.run(generate_sync, meme, images, texts, options),
+                    timeout=timeout
+                )
         except asyncio.TimeoutError:
             logger.error(f"表情包生成超时({timeout}秒)")
             raise RuntimeError("表情包生成超时")
 
         # 处理各种错误情况
-        if result is None:
-            logger.error("生成结果为空")
-        elif isinstance(result, ImageDecodeError):
-            logger.error(f"图片解码失败：{result.error}")
-        elif isinstance(result, ImageEncodeError):
-            logger.error(f"图片编码失败：{result.error}")
-        elif isinstance(result, ImageAssetMissing):
-            logger.error(f"缺少图片资源：{result.path}")
-        elif isinstance(result, DeserializeError):
-            logger.error(f"参数解析失败：{result.error}")
-        elif isinstance(result, ImageNumberMismatch):
-            num = (
-                f"{result.min} ~ {result.max}"
-                if result.min != result.max
-                else str(result.min)
-            )
-            logger.error(f"图片数量不符，应为 {num}，实际传入 {result.actual}")
-        elif isinstance(result, TextNumberMismatch):
-            num = (
-                f"{result.min} ~ {result.max}"
-                if result.min != result.max
-                else str(result.min)
-            )
-            logger.error(f"文字数量不符，应为 {num}，实际传入 {result.actual}")
-        elif isinstance(result, TextOverLength):
-            text = result.text
-            repr_text = text if len(text) <= 10 else (text[:10] + "...")
-            logger.error(f"文字过长：{repr_text}")
-        elif isinstance(result, MemeFeedback):
-            logger.error(result.feedback)
-
         if not isinstance(result, bytes):
+            logger.error(error or describe_generate_error(result))
             raise RuntimeError("表情包生成失败")
 
         return result
@@ -0,0 +1,88 @@
+"""输入图片规范化模块"""
+
+from typing import Any, Dict, Optional
+from PIL import Image
+from astrbot.api import logger
+
+from ..utils import ImageUtils, InstrumentedExecutor
+
+
+class InputNormalizer:
+    """
+    输入图片规范化（在交给生成引擎前执行）
+
+    用户上传的原图可能远大于模板需要的尺寸，直接交给生成引擎会按原尺寸解码，浪费大量CPU和内存。
+    此处先按字节数、像素数（动图为所有帧的像素总数）拒绝过大的图片（防止解压炸弹），再缩放超出尺寸的图片、对帧数过多的动图抽帧。
+    解码和重新编码在独立的线程池中进行，不阻塞事件循环。
+    """
+
+    def __init__(
+            self,
+            workers: int = 2,
+            max_size: int = 1024,
+            max_pixels: int = 0,
+            max_frames: int = 0,
+            max_bytes: int = 0,
+            max_total_pixels: int = 0
+    ):
+        """
+        Args:
+            workers: 规范化线程数
+            max_size: 输入图片的最大边长，超出时缩放
+            max_pixels: 最大像素数（宽×高），超出时拒绝，为0时不限制
+            max_frames: 动图最大帧数，超出时均匀抽帧，为0时不限制
+            max_bytes: 最大字节数，超出时拒绝，为0时不限制
+            max_total_pixels: 动图所有帧的最大像素总数（宽×高×帧数），超出时拒绝，为0时不限制
+        """
+        self.max_size = max_size
+        self.max_pixels = max(0, max_pixels)
+        self.max_frames = max(0, max_frames)
+        self.max_bytes = max(0, max_bytes)
+        self.max_total_pixels = max(0, max_total_pixels)
+        self.executor = InstrumentedExecutor("meme_input", workers)
+
+        # 统计信息
+        self.normalized = 0
+        self.rejected = 0
+
+    async def normalize(self, image: bytes) -> Optional[bytes]:
+        """
+        规范化输入图片
+
+        Args:
+            image: 图片字节数据
+
+        Returns:
+            规范化后的图片字节数据，图片超出限制或无法识别时返回None
+        """
+        if self.max_bytes and len(image) > self.max_bytes:
+            self.rejected += 1
+            logger.warning(f"输入图片过大({len(image)} 字节)，已忽略")
+            return None
+
+        try:
+            result = await self.executor.run(
+                ImageUtils.normalize_image,
+                image, self.max_size, self.max_pixels, self.max_frames, self.max_total_pixels
+            )
+        except (ValueError, OSError, Image.DecompressionBombError) as e:
+            # 单张图片无法处理时只忽略该图片，不影响同一请求中的其他图片
+            self.rejected += 1
+            logger.warning(f"输入图片已忽略: {e}")
+            return None
+
+        if result is not image:
+            self.normalized += 1
+        return result
+
+    def close(self):
+        """关闭规范化线程池"""
+        self.executor.shutdown()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取规范化统计信息"""
+        return {
+            "normalized": self.normalized,
+            "rejected": self.rejected,
+            "executor": self.executor.get_stats(),
+        }
@@ -0,0 +1,110 @@
+"""关键词匹配模块"""
+
+from typing import Dict, Optional, Tuple
+from .template_spec import TemplateSpec
+
+
+# 匹配模式
+MATCH_MODE_EXACT = "exact"    # 关键词必须是消息的第一个单词
+MATCH_MODE_PREFIX = "prefix"  # 消息以关键词开头即可（最长前缀匹配）
+MATCH_MODES = (MATCH_MODE_EXACT, MATCH_MODE_PREFIX)
+
+# prefix 模式下，与后续文字粘连（中间没有空格）时关键词的最小长度
+# 单字关键词（吃/跳/转…）粘连时几乎总是普通聊天（“吃饭了吗”），只在后面为空或有空格时触发
+MIN_GLUED_KEYWORD_LENGTH = 2
+
+# 字典树中标记关键词结束的键，不会与任何单字符冲突
+_END = ""
+
+
+class KeywordMatcher:
+    """
+    关键词匹配器，构建后只读
+
+    prefix 模式的规则：关键词后为消息结尾或空白时总是匹配；
+    关键词后紧跟其他文字时，以英文字母或数字结尾的关键词要求下一个字符不是英文字母或数字（单词边界，
+    避免“photo”匹配“ph”），其余关键词要求长度不少于 MIN_GLUED_KEYWORD_LENGTH。
+    多个关键词满足条件时取最长的一个。
+    """
+
+    __slots__ = ("mode", "_dispatch", "_trie")
+
+    def __init__(self, dispatch: Dict[str, TemplateSpec], mode: str = MATCH_MODE_EXACT):
+        """
+        Args:
+            dispatch: 关键词 -> 模板 的映射
+            mode: 匹配模式，exact 或 prefix
+        """
+        self.mode = mode if mode in MATCH_MODES else MATCH_MODE_EXACT
+        self._dispatch = dispatch
+        self._trie: dict = self._build_trie(dispatch) if self.mode == MATCH_MODE_PREFIX else {}
+
+    @staticmethod
+    def _build_trie(dispatch: Dict[str, TemplateSpec]) -> dict:
+        """根据关键词构建字典树"""
+        root: dict = {}
+        for keyword, spec in dispatch.items():
+            if not keyword:
+                continue
+            node = root
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[_END] = (keyword, spec)
+        return root
+
+    def match(self, message_str: str) -> Optional[Tuple[str, TemplateSpec]]:
+        """
+        匹配消息开头的关键词
+
+        Args:
+            message_str: 消息字符串
+
+        Returns:
+            (关键词, 模板)，未匹配返回None
+        """
+        if self.mode == MATCH_MODE_PREFIX:
+            return self._match_prefix(message_str)
+
+        words = message_str.split(None, 1)
+        if not words:
+            return None
+        spec = self._dispatch.get(words[0])
+        if spec is None:
+            return None
+        return words[0], spec
+
+    def _match_prefix(self, message_str: str) -> Optional[Tuple[str, TemplateSpec]]:
+        """单次遍历消息，返回满足边界规则的最长关键词前缀"""
+        text = message_str.lstrip()
+        # 首字符不在字典树中时直接返回，非匹配消息只需一次哈希查找
+        node = self._trie.get(text[:1])
+        if node is None:
+            return None
+
+        matched = None
+        end = 1
+        while True:
+            candidate = node.get(_END)
+            if candidate is not None and self._accepts(candidate[0], text[end:end + 1]):
+                matched = candidate
+            if end >= len(text):
+                break
+            node = node.get(text[end])
+            if node is None:
+                break
+            end += 1
+        return matched
+
+    @staticmethod
+    def _accepts(keyword: str, next_char: str) -> bool:
+        """关键词后紧跟 next_char（消息结尾时为空字符串）时是否视为触发"""
+        if not next_char or next_char.isspace():
+            return True
+        if _is_ascii_word(keyword[-1]):
+            return not _is_ascii_word(next_char)
+        return len(keyword) >= MIN_GLUED_KEYWORD_LENGTH
+
+
+def _is_ascii_word(char: str) -> bool:
+    """是否为英文字母或数字"""
+    return char.isascii() and char.isalnum()
@@ -1,8 +1,10 @@
 """表情包管理器模块"""
 
 import asyncio
+import hashlib
+import json
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 from meme_generator.tools import MemeProperties, MemeSortBy, render_meme_list
 from meme_generator.resources import check_resources_in_background
 from astrbot.api import logger
@@ -10,10 +12,21 @@ from astrbot.core.platform import AstrMessageEvent
 import astrbot.core.message.components as Comp
 
 from .template_manager import TemplateManager
-from .param_collector import ParamCollector
+from .param_collector import ParamCollector, ImageInput
+from .input_normalizer import InputNormalizer
 from .image_generator import ImageGenerator
+from .render_scheduler import RenderScheduler
+from .output_processor import OutputProcessor
+from .template_spec import TemplateSpec
 from ..config import MemeConfig
-from ..utils import ImageUtils, CooldownManager, AvatarCache, NetworkUtils, CacheManager
+from ..utils import (
+    CooldownManager, AvatarCache, NetworkUtils, CacheManager, InstrumentedExecutor, SingleFlight,
+    ResultCache
+)
+
+
+# 维护线程池大小（资源检查、模板加载、列表绘制等低频任务）
+MAINTENANCE_WORKERS = 2
 
 
 class MemeManager:
@@ -21,23 +34,61 @@ class MemeManager:
     
     def __init__(self, config: MemeConfig, data_dir: str = None):
         self.config = config
-        self.template_manager = TemplateManager()
-        self.image_generator = ImageGenerator()
+        # 维护任务使用独立的小线程池，不与表情包渲染争抢线程
+        self.maintenance_executor = InstrumentedExecutor("meme_maintenance", MAINTENANCE_WORKERS)
+        self.template_manager = TemplateManager(
+            config.disabled_templates, config.keyword_match_mode, self.maintenance_executor
+        )
+        self.image_generator = ImageGenerator(config.render_backend, config.render_workers)
+        # 输入规范化和输出压缩使用各自的小线程池，不按渲染并发数扩容
+        self.output_processor = OutputProcessor(config.image_workers)
+        self.input_normalizer = InputNormalizer(
+            config.image_workers,
+            max_size=config.input_max_size,
+            max_pixels=config.input_max_megapixels * 1000 * 1000,
+            max_frames=config.input_max_frames,
+            max_bytes=config.input_max_mb * 1024 * 1024,
+            max_total_pixels=config.input_max_total_megapixels * 1000 * 1000
+        )
+        # 同时渲染数不超过渲染并发数：多放行的请求只会在渲染线程前排队，排队时间计入生成超时
+        max_renders = min(config.max_concurrent_renders or config.render_workers, config.render_workers)
+        self.render_scheduler = RenderScheduler(
+            max_renders, config.max_queued_renders, config.max_queued_renders_per_group
+        )
+        # 合并输入完全相同的并发生成请求（如群聊中的“+1”接龙）
+        self.render_flight = SingleFlight()
         self.cooldown_manager = CooldownManager(config.cooldown_seconds)
 
         # 初始化头像缓存和网络工具
         # 使用传入的数据目录，如果没有则使用默认路径
-        if data_dir:
-            cache_dir = Path(data_dir) / "cache" / "meme_avatars"
-        else:
-            cache_dir = Path("data/cache/meme_avatars")  # 默认路径
+        cache_root = Path(data_dir) / "cache" if data_dir else Path("data/cache")
+        cache_dir = cache_root / "meme_avatars"
+
+        # 初始化生成结果缓存
+        self.result_cache: Optional[ResultCache] = None
+        if config.enable_result_cache:
+            self.result_cache = ResultCache(
+                memory_bytes=config.result_cache_memory_mb * 1024 * 1024,
+                cache_dir=str(cache_root / "meme_results"),
+                disk_bytes=config.result_cache_disk_mb * 1024 * 1024,
+                executor=self.maintenance_executor
+            )
 
         self.avatar_cache = AvatarCache(
             cache_expire_hours=config.cache_expire_hours,
             enable_cache=config.enable_avatar_cache,
-            cache_dir=str(cache_dir)
+            cache_dir=str(cache_dir),
+            memory_bytes=config.avatar_memory_cache_mb * 1024 * 1024,
+            max_bytes=config.avatar_cache_max_mb * 1024 * 1024,
+            layout=config.avatar_cache_layout
+        )
+        self.network_utils = NetworkUtils(
+            self.avatar_cache,
+            connect_timeout=config.network_connect_timeout,
+            request_timeout=config.network_timeout,
+            limit_per_host=config.network_limit_per_host,
+            max_download_bytes=config.input_max_mb * 1024 * 1024
         )
-        self.network_utils = NetworkUtils(self.avatar_cache)
 
         # 初始化缓存管理器，使用配置的缓存过期时间
         self.cache_manager = CacheManager(
@@ -45,14 +96,24 @@ class MemeManager:
             cleanup_interval_hours=config.cache_expire_hours
         )
 
-        # 初始化参数收集器（传入网络工具）
-        self.param_collector = ParamCollector(self.network_utils)
+        # 初始化参数收集器（传入网络工具和输入规范化器）
+        self.param_collector = ParamCollector(self.network_utils, self.input_normalizer)
 
         # 初始化资源检查（固定启用）
         logger.info("🎭 表情包插件正在初始化...")
         # 异步启动资源检查，并在完成后刷新模板
         asyncio.create_task(self._check_resources_and_refresh())
 
+        # 预热渲染后端
+        asyncio.create_task(self.image_generator.start())
+
+        # 在线程池中打开头像缓存索引（可能需要导入旧版元数据或迁移存储布局）
+        asyncio.create_task(self.avatar_cache.start())
+
+        # 加载结果缓存的磁盘索引
+        if self.result_cache:
+            asyncio.create_task(self.result_cache.load())
+
         # 启动缓存清理任务
         if config.enable_avatar_cache:
             try:
@@ -65,14 +126,34 @@ class MemeManager:
     async def _check_resources_and_refresh(self):
         """检查资源并在完成后刷新模板"""
         try:
-            # 在线程池中执行资源检查（因为它是同步的）
-            await asyncio.to_thread(check_resources_in_background)
+            # 在维护线程池中执行资源检查（因为它是同步的）
+            await self.maintenance_executor.run(check_resources_in_background)
             # 刷新模板列表
             await self.template_manager.refresh_templates()
         except Exception as e:
             logger.error(f"❌ 表情包资源检查失败: {e}")
             logger.warning("⚠️ 部分表情包模板可能无法正常使用，建议检查网络连接后重启插件")
     
+    async def close(self):
+        """释放渲染后端、线程池、网络会话等资源"""
+        await self.network_utils.close()
+        await self.image_generator.close()
+        self.output_processor.close()
+        self.input_normalizer.close()
+        if self.result_cache:
+            await self.result_cache.close()
+        await self.avatar_cache.close()
+        self.maintenance_executor.shutdown()
+
+    def get_executor_stats(self) -> dict:
+        """获取渲染、输入规范化、后处理与维护线程池的统计信息"""
+        return {
+            "render": self.image_generator.get_stats(),
+            "input": self.input_normalizer.get_stats(),
+            "output": self.output_processor.get_stats(),
+            "maintenance": self.maintenance_executor.get_stats(),
+        }
+
     async def generate_template_list(self) -> bytes | None:
         """
         生成表情包模板列表图片
@@ -83,12 +164,12 @@ class MemeManager:
         sort_by = MemeSortBy.KeywordsPinyin
 
         meme_properties: dict[str, MemeProperties] = {}
-        all_memes = await self.template_manager.get_all_memes()
-        for meme in all_memes:
+        all_specs = await self.template_manager.get_all_specs()
+        for spec in all_specs:
             properties = MemeProperties(disabled=False, hot=False, new=False)
-            meme_properties[meme.key] = properties
+            meme_properties[spec.key] = properties
 
-        output: bytes | None = await asyncio.to_thread(
+        output: bytes | None = await self.maintenance_executor.run(
             render_meme_list,  # type: ignore
             meme_properties=meme_properties,
             exclude_memes=[],
@@ -112,22 +193,19 @@ class MemeManager:
         if not await self.template_manager.keyword_exists(keyword):
             return None
 
-        meme = await self.template_manager.find_meme(keyword)
-        if not meme:
+        spec = await self.template_manager.find_spec(keyword)
+        if not spec:
             return None
-        
-        info = meme.info
-        params = info.params
-        
+
         template_info = {
-            "name": meme.key,
-            "keywords": info.keywords,
-            "min_images": params.min_images,
-            "max_images": params.max_images,
-            "min_texts": params.min_texts,
-            "max_texts": params.max_texts,
-            "default_texts": params.default_texts,
-            "tags": list(info.tags),
+            "name": spec.key,
+            "keywords": list(spec.keywords),
+            "min_images": spec.min_images,
+            "max_images": spec.max_images,
+            "min_texts": spec.min_texts,
+            "max_texts": spec.max_texts,
+            "default_texts": list(spec.default_texts),
+            "tags": list(spec.tags),
         }
 
         # 不再生成预览图
@@ -135,6 +213,62 @@ class MemeManager:
 
         return template_info
     
+    @staticmethod
+    def _build_request_digest(
+            key: str,
+            images: List[ImageInput],
+            texts: List[str],
+            options: Dict[str, Union[bool, str, int, float]],
+            output_profile: str
+    ) -> str:
+        """根据模板key、图片内容哈希、文本、选项和输出设置计算请求摘要"""
+        payload = json.dumps(
+            [
+                key,
+                [(name, hashlib.blake2b(data, digest_size=16).hexdigest()) for name, data in images],
+                texts,
+                sorted(options.items()),
+                output_profile,
+            ],
+            ensure_ascii=False,
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+    async def _render(
+            self,
+            digest: str,
+            queue_key: str,
+            spec: TemplateSpec,
+            images: List[ImageInput],
+            texts: List[str],
+            options: Dict[str, Union[bool, str, int, float]],
+            target_bytes: int = 0,
+            cacheable: bool = True
+    ) -> bytes:
+        """在渲染名额内生成表情包、进行压缩处理，cacheable 为 True 时写入结果缓存"""
+        async with self.render_scheduler.slot(queue_key):
+            # 生成表情包
+            image: bytes = await self.image_generator.generate_image(
+                spec.meme, images, texts, options, self.config.generation_timeout
+            )
+
+            # 自动压缩处理（在后处理线程池中进行，失败时使用原图）
+            image = await self.output_processor.process(image, target_bytes)
+
+        if self.result_cache and cacheable:
+            await self.result_cache.put(digest, image)
+
+        return image
+
+    @staticmethod
+    def _get_queue_key(event: AstrMessageEvent) -> str:
+        """获取渲染调度的队列键：同一平台的同一群聊（私聊按用户）共用一个队列"""
+        platform = event.get_platform_name()
+        group_id = event.get_group_id()
+        if group_id:
+            return f"{platform}:group:{group_id}"
+        return f"{platform}:private:{event.get_sender_id()}"
+
     async def generate_meme(self, event: AstrMessageEvent) -> Optional[bytes]:
         """
         生成表情包主流程
@@ -144,6 +278,9 @@ class MemeManager:
 
         Returns:
             生成的表情包图片字节数据，失败返回None
+
+        Raises:
+            RenderOverloadError: 渲染繁忙、请求被拒绝时抛出
         """
         # 检查用户冷却
         user_id = event.get_sender_id()
@@ -156,34 +293,38 @@ class MemeManager:
         if not message_str:
             return None
         
-        # 查找关键词
-        keyword = await self.template_manager.find_keyword(message_str)
-        if not keyword:
+        # 查找关键词和模板（分发索引已排除禁用模板）
+        matched = await self.template_manager.match_message(message_str)
+        if not matched:
             return None
+        keyword, spec = matched
 
-        if self.config.is_template_disabled(keyword):
+        # 收集生成参数
+        params = await self.param_collector.collect_params(event, keyword, spec)
+        if params is None:
+            # 参数数量无法满足模板要求，不进入渲染
             return None
+        meme_images, texts, options = params
 
-        # 查找模板
-        meme = await self.template_manager.find_meme(keyword)
-        if not meme:
-            return None
-        
-        # 收集生成参数
-        meme_images, texts, options = await self.param_collector.collect_params(event, keyword, meme)
-        
-        # 生成表情包
-        image: bytes = await self.image_generator.generate_image(
-            meme, meme_images, texts, options, self.config.generation_timeout
+        # 输出字节预算因平台而异，参与缓存键计算
+        target_bytes = self.config.get_output_size_limit(event.get_platform_name())
+        digest = self._build_request_digest(
+            spec.key, meme_images, texts, options, self.output_processor.profile(target_bytes)
         )
-        
-        # 自动压缩处理
-        try:
-            compressed = ImageUtils.compress_image(image)
-            if compressed:
-                image = compressed
-        except Exception:
-            pass  # 压缩失败时使用原图
+
+        # 优先使用缓存的生成结果；随机选项未设置的模板每次结果不同，不读写缓存
+        cacheable = self.result_cache is not None and spec.is_deterministic(options)
+        image = await self.result_cache.get(digest) if cacheable else None
+        if image is None:
+            # 只拒绝需要新渲染的请求：命中缓存或加入进行中的相同渲染都不占用渲染名额
+            queue_key = self._get_queue_key(event)
+            if digest not in self.render_flight and self.render_scheduler.is_saturated(queue_key):
+                self.render_scheduler.reject()
+            # 输入相同的并发请求共享同一次渲染
+            image = await self.render_flight.do(
+                digest,
+                lambda: self._render(digest, queue_key, spec, meme_images, texts, options, target_bytes, cacheable)
+            )
 
         # 记录用户使用时间
         self.cooldown_manager.record_user_use(user_id)
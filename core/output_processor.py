@@ -0,0 +1,102 @@
+"""输出后处理模块"""
+
+import time
+from typing import Any, Dict
+from astrbot.api import logger
+
+from ..utils import ImageUtils, InstrumentedExecutor
+
+
+# 输出图片的默认最大边长
+DEFAULT_OUTPUT_MAX_SIZE = 512
+
+
+class OutputProcessor:
+    """
+    生成结果后处理（缩放、重新编码）
+
+    解码和重新编码在独立的线程池中进行，不阻塞事件循环；已满足尺寸和字节预算的图片只读取文件头即返回原图。
+    GIF 动图按帧处理：缩放、合并重复帧，超出预算时减少颜色数和帧率。
+    """
+
+    def __init__(self, workers: int = 2, max_size: int = DEFAULT_OUTPUT_MAX_SIZE):
+        """
+        Args:
+            workers: 后处理线程数
+            max_size: 输出图片的最大边长
+        """
+        self.max_size = max_size
+        self.executor = InstrumentedExecutor("meme_output", workers)
+
+        # 统计信息
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def profile(self, target_bytes: int = 0) -> str:
+        """输出设置摘要，用于结果缓存键"""
+        return f"max{self.max_size}-target{target_bytes}"
+
+    def _within_limits(self, image: bytes, target_bytes: int, probe) -> bool:
+        """快速判断图片是否无需处理（只解析文件头）"""
+        if 0 < target_bytes < len(image) or probe is None:
+            return False
+        _, width, height = probe
+        return width <= self.max_size and height <= self.max_size
+
+    async def process(self, image: bytes, target_bytes: int = 0) -> bytes:
+        """
+        对生成结果进行后处理
+
+        Args:
+            image: 生成的图片字节数据
+            target_bytes: 输出字节预算，为0时不限制
+
+        Returns:
+            处理后的图片字节数据，无需处理或处理失败时返回原图
+        """
+        probe = ImageUtils.probe_image(image)
+        if self._within_limits(image, target_bytes, probe):
+            self.skipped += 1
+            return image
+
+        if probe is not None and probe[0] == "GIF":
+            func = ImageUtils.optimize_gif
+        else:
+            func = ImageUtils.compress_image
+
+        start = time.perf_counter()
+        try:
+            compressed = await self.executor.run(func, image, self.max_size, target_bytes)
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"表情包后处理失败，使用原图: {e}")
+            return image
+        finally:
+            elapsed = time.perf_counter() - start
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+
+        self.processed += 1
+        # 重新编码（包括超出预算时的尽力结果）不比原图小时使用原图
+        if compressed and len(compressed) < len(image):
+            return compressed
+        return image
+
+    def close(self):
+        """关闭后处理线程池"""
+        self.executor.shutdown()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取后处理统计信息"""
+        runs = self.processed + self.failed
+        return {
+            "processed": self.processed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "avg_ms": self.total_seconds / runs * 1000 if runs else 0.0,
+            "max_ms": self.max_seconds * 1000,
+            "executor": self.executor.get_stats(),
+        }
@@ -1,47 +1,55 @@
 """参数收集模块"""
 
+import asyncio
 import base64
-from typing import List, Dict, Union, Tuple
-from meme_generator import Meme
-from meme_generator import Image as MemeImage
+from typing import Any, Awaitable, List, Dict, Optional, Union, Tuple
 from astrbot.core.platform import AstrMessageEvent
 import astrbot.core.message.components as Comp
+from astrbot.api import logger
 from ..utils import PlatformUtils
+from .template_spec import TemplateSpec
+from .input_normalizer import InputNormalizer
+
+
+# 图片参数：(名称, 图片字节数据)，在最终生成时才转换为生成引擎的 Image 对象
+ImageInput = Tuple[str, bytes]
 
 
 class ParamCollector:
     """参数收集器"""
 
-    def __init__(self, network_utils=None):
+    def __init__(self, network_utils=None, input_normalizer: Optional[InputNormalizer] = None):
         self.network_utils = network_utils
+        self.input_normalizer = input_normalizer
 
     async def collect_params(
             self,
             event: AstrMessageEvent,
             keyword: str,
-            meme: Meme
-    ) -> Tuple[List[MemeImage], List[str], Dict[str, Union[bool, str, int, float]]]:
+            spec: TemplateSpec
+    ) -> Optional[Tuple[List[ImageInput], List[str], Dict[str, Union[bool, str, int, float]]]]:
         """
         收集表情包生成所需的参数
+
+        先根据模板的参数要求规划需要的网络请求，只获取实际会用到的头像和用户信息，再并发执行。
         
         Args:
             event: 消息事件
             keyword: 触发关键词
-            meme: 表情包模板
+            spec: 表情包模板元数据
             
         Returns:
-            (图片列表, 文本列表, 选项参数)
+            (图片列表, 文本列表, 选项参数)，图片或文字数量无法满足模板要求时返回None
         """
-        meme_images: List[MemeImage] = []
+        meme_images: List[ImageInput] = []
         texts: List[str] = []
         options: Dict[str, Union[bool, str, int, float]] = {}
 
-        params = meme.info.params
-        min_images: int = params.min_images  # noqa: F841
-        max_images: int = params.max_images
-        min_texts: int = params.min_texts
-        max_texts: int = params.max_texts
-        default_texts: List[str] = params.default_texts
+        min_images: int = spec.min_images
+        max_images: int = spec.max_images
+        min_texts: int = spec.min_texts
+        max_texts: int = spec.max_texts
+        default_texts: List[str] = list(spec.default_texts)
 
         messages = event.get_messages()
         send_id: str = event.get_sender_id()
@@ -51,49 +59,134 @@ class ParamCollector:
         target_ids: List[str] = []
         target_names: List[str] = []
 
-        async def _process_segment(_seg, name):
-            """解析消息组件并提取相关参数"""
+        # 第一步：按消息顺序解析消息组件，文本不涉及I/O直接收集，图片和@用户记录为 (类型, 参数)
+        segments: List[Tuple[str, Any]] = []
+
+        # 前缀匹配模式下关键词可能与当前消息的首段文本粘连（如“举牌你好”）
+        keyword_pending = True
+
+        def _parse_segment(_seg, name, is_reply=False):
+            """解析消息组件"""
+            nonlocal keyword_pending
             if isinstance(_seg, Comp.Image):
-                await self._process_image_segment(_seg, name, meme_images)
+                segments.append(("image", (_seg, name)))
             elif isinstance(_seg, Comp.At):
-                await self._process_at_segment(_seg, event, self_id, target_ids, target_names, options, meme_images)
+                seg_qq = str(_seg.qq)
+                if seg_qq != self_id:
+                    target_ids.append(seg_qq)
+                    segments.append(("at", seg_qq))
             elif isinstance(_seg, Comp.Plain):
-                self._process_plain_segment(_seg, keyword, texts)
+                strip_prefix = keyword_pending and not is_reply
+                self._process_plain_segment(_seg, keyword, texts, strip_prefix)
+                if not is_reply:
+                    keyword_pending = False
 
         # 处理引用消息内容
         reply_seg = next((seg for seg in messages if isinstance(seg, Comp.Reply)), None)
         if reply_seg and reply_seg.chain:
             for seg in reply_seg.chain:
-                await _process_segment(seg, "引用用户")
+                _parse_segment(seg, "引用用户", is_reply=True)
 
         # 处理当前消息内容
         for seg in messages:
-            await _process_segment(seg, sender_name)
+            _parse_segment(seg, sender_name)
+
+        # 第二步：在任何网络请求之前检查参数数量，注定失败的请求直接跳过
+        fill_limit = 2 if self.network_utils else 0
+        if min(max_images, len(segments) + fill_limit) < min_images:
+            logger.info(f"表情包 {spec.key} 需要至少 {min_images} 张图片，已跳过")
+            return None
+        if len(texts) + max(len(target_ids), 1) + len(default_texts) < min_texts:
+            logger.info(f"表情包 {spec.key} 需要至少 {min_texts} 段文字，已跳过")
+            return None
+
+        # 第三步：按模板需求规划网络请求
+        # 昵称只在模板有 name/gender 选项或需要用昵称补全文本时获取；超出最大图片数的图片和@头像不会被使用，不下载
+        need_user_info = spec.uses_user_info or len(texts) < min_texts
+        planned: List[Tuple[str, Awaitable]] = []
+        for index, (kind, arg) in enumerate(segments):
+            used = index < max_images
+            if kind == "image" and used:
+                planned.append(("image", self._load_image_segment(*arg)))
+            elif kind == "at" and used:
+                planned.append(("at", self._fetch_at_target(event, arg)))
+            elif kind == "at" and need_user_info:
+                planned.append(("info", PlatformUtils.get_user_extra_info(event, arg)))
 
         # 获取发送者的详细信息
-        if not target_ids:
-            if result := await PlatformUtils.get_user_extra_info(event, send_id):
-                nickname, sex = result
-                options["name"], options["gender"] = nickname, sex
-                target_names.append(nickname)
+        if not target_ids and need_user_info:
+            planned.append(("info", PlatformUtils.get_user_extra_info(event, send_id)))
+
+        # 按规划的图片数量预先获取补全用的头像（发送者、机器人）
+        fill_ids = self._plan_fill_avatars(send_id, self_id, len(segments), max_images)
+        for user_id in fill_ids:
+            planned.append(("fill", self._fetch_avatar(user_id)))
+
+        # 第四步：并发执行所有请求
+        results = await asyncio.gather(*(coro for _, coro in planned))
+
+        # 第五步：按规划顺序合并结果
+        def _apply_user_info(nickname, sex):
+            if "name" in spec.option_names:
+                options["name"] = nickname
+            if "gender" in spec.option_names:
+                options["gender"] = sex
+            target_names.append(nickname)
+
+        fill_avatars: Dict[str, Optional[bytes]] = {}
+        fill_iter = iter(fill_ids)
+        for (kind, _), result in zip(planned, results):
+            if kind == "image":
+                if result:
+                    meme_images.append(result)
+            elif kind == "at":
+                if result:
+                    nickname, sex, at_avatar = result
+                    _apply_user_info(nickname, sex)
+                    meme_images.append((nickname, at_avatar))
+            elif kind == "info":
+                if result:
+                    _apply_user_info(*result)
+            elif kind == "fill":
+                fill_avatars[next(fill_iter)] = result
 
         if not target_names:
             target_names.append(sender_name)
 
         # 智能补全图片参数（优先使用用户头像）
-        await self._auto_fill_images(event, send_id, self_id, sender_name, meme_images, max_images)
+        await self._auto_fill_images(send_id, self_id, sender_name, meme_images, max_images, fill_avatars)
 
         # 智能补全文本参数（使用昵称和默认文本）
         self._auto_fill_texts(texts, target_names, default_texts, min_texts, max_texts)
 
+        # 部分图片获取失败等情况下参数仍不足时不再交给生成引擎
+        if len(meme_images) < min_images or len(texts) < min_texts:
+            logger.info(
+                f"表情包 {spec.key} 参数不足（图片 {len(meme_images)}/{min_images}，文字 {len(texts)}/{min_texts}），已跳过"
+            )
+            return None
+
         return meme_images, texts, options
 
-    async def _process_image_segment(self, seg: Comp.Image, name: str, meme_images: List[MemeImage]):
-        """处理图片组件"""
+    @staticmethod
+    def _plan_fill_avatars(send_id: str, self_id: str, planned_images: int, max_images: int) -> List[str]:
+        """根据规划的图片数量确定需要预先获取头像的用户（发送者优先）"""
+        missing = max(0, max_images - planned_images)
+        return [send_id, self_id][:missing]
+
+    async def _fetch_avatar(self, user_id: str) -> Optional[bytes]:
+        """获取用户头像"""
+        if not self.network_utils:
+            return None
+        return await self.network_utils.get_avatar(user_id)
+
+    async def _load_image_segment(self, seg: Comp.Image, name: str) -> Optional[ImageInput]:
+        """读取图片组件"""
+        file_content = None
         if hasattr(seg, "url") and seg.url:
             img_url = seg.url
-            if self.network_utils and (file_content := await self.network_utils.download_image(img_url)):
-                meme_images.append(MemeImage(name, file_content))
+            if self.network_utils:
+                file_content = await self.network_utils.download_image(img_url)
 
         elif hasattr(seg, "file"):
             file_content = seg.file
@@ -101,54 +194,60 @@ class ParamCollector:
                 if file_content.startswith("base64://"):
                     file_content = file_content[len("base64://"):]
                 file_content = base64.b64decode(file_content)
-            if isinstance(file_content, bytes):
-                meme_images.append(MemeImage(name, file_content))
 
-    async def _process_at_segment(
+        if not isinstance(file_content, bytes) or not file_content:
+            return None
+        # 用户上传的原图先规范化（缩放、抽帧、拒绝超限图片），再交给生成引擎
+        if self.input_normalizer:
+            file_content = await self.input_normalizer.normalize(file_content)
+        return (name, file_content) if file_content else None
+
+    async def _fetch_at_target(
             self,
-            seg: Comp.At,
             event: AstrMessageEvent,
-            self_id: str,
-            target_ids: List[str],
-            target_names: List[str],
-            options: Dict[str, Union[bool, str, int, float]],
-            meme_images: List[MemeImage]
-    ):
-        """处理@组件"""
-        seg_qq = str(seg.qq)
-        if seg_qq != self_id:
-            target_ids.append(seg_qq)
-            if self.network_utils and (at_avatar := await self.network_utils.get_avatar(seg_qq)):
-                # 获取被@用户的详细信息
-                if result := await PlatformUtils.get_user_extra_info(event, seg_qq):
-                    nickname, sex = result
-                    options["name"], options["gender"] = nickname, sex
-                    target_names.append(nickname)
-                    meme_images.append(MemeImage(nickname, at_avatar))
-
-    def _process_plain_segment(self, seg: Comp.Plain, keyword: str, texts: List[str]):
+            target_id: str
+    ) -> Optional[Tuple[str, Union[str, int, None], bytes]]:
+        """并发获取被@用户的头像和详细信息，返回 (昵称, 性别, 头像)，任一失败时返回None"""
+        if not self.network_utils:
+            return None
+        at_avatar, result = await asyncio.gather(
+            self.network_utils.get_avatar(target_id),
+            PlatformUtils.get_user_extra_info(event, target_id)
+        )
+        if at_avatar and result:
+            nickname, sex = result
+            return nickname, sex, at_avatar
+        return None
+
+    def _process_plain_segment(self, seg: Comp.Plain, keyword: str, texts: List[str], strip_prefix: bool = False):
         """处理纯文本组件"""
         plains: List[str] = seg.text.strip().split()
+        # 去掉与关键词粘连的前缀，保留其后的文本
+        if strip_prefix and plains and plains[0] != keyword and plains[0].startswith(keyword):
+            plains[0] = plains[0][len(keyword):]
         for text in plains:
             if text != keyword:  # 排除关键词本身
                 texts.append(text)
 
     async def _auto_fill_images(
             self,
-            event: AstrMessageEvent,
             send_id: str,
             self_id: str,
             sender_name: str,
-            meme_images: List[MemeImage],
-            max_images: int
+            meme_images: List[ImageInput],
+            max_images: int,
+            fill_avatars: Dict[str, Optional[bytes]]
     ):
-        """自动补全图片参数"""
-        if self.network_utils and len(meme_images) < max_images:
-            if use_avatar := await self.network_utils.get_avatar(send_id):
-                meme_images.insert(0, MemeImage(sender_name, use_avatar))
-        if self.network_utils and len(meme_images) < max_images:
-            if bot_avatar := await self.network_utils.get_avatar(self_id):
-                meme_images.insert(0, MemeImage("机器人", bot_avatar))
+        """自动补全图片参数，优先使用预先获取的头像，部分图片获取失败时再补充获取"""
+        for user_id, name in ((send_id, sender_name), (self_id, "机器人")):
+            if not self.network_utils or len(meme_images) >= max_images:
+                break
+            if user_id in fill_avatars:
+                avatar = fill_avatars[user_id]
+            else:
+                avatar = await self.network_utils.get_avatar(user_id)
+            if avatar:
+                meme_images.insert(0, (name, avatar))
         # 截取到最大数量
         meme_images[:] = meme_images[:max_images]
 
@@ -0,0 +1,287 @@
+"""多进程渲染池模块"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Tuple, Union
+from astrbot.api import logger
+
+from ..render_worker import worker_main
+
+
+# 工作进程启动（加载生成引擎）的最长等待时间(秒)
+WORKER_START_TIMEOUT = 60
+
+
+class _Worker:
+    """单个工作进程及其管道"""
+
+    __slots__ = ("process", "conn")
+
+    def __init__(self, process, conn: Connection):
+        self.process = process
+        self.conn = conn
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self):
+        """强制终止工作进程"""
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+
+
+class _Job:
+    """待渲染任务"""
+
+    __slots__ = ("payload", "timeout", "future")
+
+    def __init__(self, payload: tuple, timeout: float, future: asyncio.Future):
+        self.payload = payload
+        self.timeout = timeout
+        self.future = future
+
+
+class ProcessRenderPool:
+    """
+    多进程渲染池
+
+    固定数量的预热工作进程，每个进程由一个协程独占调度。渲染超时的进程会被直接终止并替换，
+    不会像线程那样在超时后继续占用资源。与子进程的阻塞式管道通信在独立的线程池中进行，
+    不占用事件循环的默认线程池。
+    """
+
+    def __init__(self, workers: int = 2):
+        self.workers = max(1, workers)
+        self._ctx = self._get_context()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._slots: List[Optional[_Worker]] = [None] * self.workers
+        self._busy: List[bool] = [False] * self.workers
+        self._tasks: List[asyncio.Task] = []
+        self._ipc_executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="meme_render_ipc")
+        self._started = False
+        self._closed = False
+
+        # 统计信息
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    @staticmethod
+    def _get_context():
+        """
+        获取多进程上下文
+
+        优先使用 forkserver，不支持的平台（Windows）使用 spawn。工作进程只导入 render_worker 模块，
+        不设置 forkserver 预加载（该设置为进程全局状态，会影响 AstrBot 和其他插件）。
+        """
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            return multiprocessing.get_context("forkserver")
+        return multiprocessing.get_context("spawn")
+
+    async def start(self):
+        """启动并预热全部工作进程"""
+        if self._started or self._closed:
+            return
+        self._started = True
+        self._tasks = [asyncio.create_task(self._serve(index)) for index in range(self.workers)]
+        logger.debug(f"渲染进程池已启动，工作进程数: {self.workers}")
+
+    async def close(self):
+        """停止调度并终止全部工作进程"""
+        self._closed = True
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks.clear()
+
+        # 取消仍在排队的任务
+        while not self._queue.empty():
+            job: _Job = self._queue.get_nowait()
+            if not job.future.done():
+                job.future.cancel()
+
+        for index, worker in enumerate(self._slots):
+            if worker:
+                await asyncio.to_thread(self._stop_worker, worker)
+                self._slots[index] = None
+        self._ipc_executor.shutdown(wait=False)
+        logger.debug("渲染进程池已关闭")
+
+    async def submit(
+            self,
+            key: str,
+            images: List[Tuple[str, bytes]],
+            texts: List[str],
+            options: Dict[str, Union[bool, str, int, float]],
+            timeout: float
+    ) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        提交渲染任务
+
+        Args:
+            key: 模板key
+            images: 图片列表，元素为 (名称, 图片字节数据)
+            texts: 文本列表
+            options: 选项参数
+            timeout: 单个任务在工作进程中的最长执行时间(秒)
+
+        Returns:
+            (图片字节数据, None) 或 (None, 错误描述)
+
+        Raises:
+            asyncio.TimeoutError: 工作进程执行超时（该进程已被终止并替换）
+            RuntimeError: 渲染池已关闭或工作进程异常退出
+        """
+        if self._closed:
+            raise RuntimeError("渲染进程池已关闭")
+        if not self._started:
+            await self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Job((key, images, texts, options), timeout, future))
+        return await future
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取渲染池统计信息"""
+        return {
+            "backend": "process",
+            "workers": self.workers,
+            "alive": sum(1 for worker in self._slots if worker and worker.is_alive()),
+            "busy": sum(self._busy),
+            "queue_depth": self._queue.qsize(),
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+        }
+
+    async def _serve(self, index: int):
+        """单个工作进程的调度循环"""
+        loop = asyncio.get_running_loop()
+        try:
+            # 预热：提前启动工作进程，避免首个请求承担启动开销
+            await self._ensure_worker(index, loop)
+        except Exception as e:
+            logger.error(f"渲染进程启动失败: {e}")
+
+        while True:
+            job: _Job = await self._queue.get()
+            if job.future.done():
+                # 调用方已超时或取消
+                continue
+
+            self._busy[index] = True
+            try:
+                worker = await self._ensure_worker(index, loop)
+                response = await loop.run_in_executor(
+                    self._ipc_executor, self._exchange, worker, job.payload, job.timeout
+                )
+                if response is None:
+                    # 超时：终止并替换工作进程
+                    self.timeouts += 1
+                    logger.warning(f"渲染进程执行超时({job.timeout}秒)，正在重启该进程")
+                    await self._replace_worker(index, loop)
+                    self._set_exception(job, asyncio.TimeoutError())
+                    continue
+
+                status, payload = response
+                if status == "ok":
+                    self.completed += 1
+                    self._set_result(job, (payload, None))
+                else:
+                    self.failed += 1
+                    self._set_result(job, (None, payload))
+            except asyncio.CancelledError:
+                self._set_exception(job, RuntimeError("渲染进程池已关闭"))
+                raise
+            except Exception as e:
+                # 工作进程崩溃或管道断开
+                self.failed += 1
+                logger.error(f"渲染进程异常，正在重启该进程: {e}")
+                await self._replace_worker(index, loop)
+                self._set_exception(job, RuntimeError(f"渲染进程异常: {e}"))
+            finally:
+                self._busy[index] = False
+
+    @staticmethod
+    def _set_result(job: _Job, result):
+        if not job.future.done():
+            job.future.set_result(result)
+
+    @staticmethod
+    def _set_exception(job: _Job, exc: BaseException):
+        if not job.future.done():
+            job.future.set_exception(exc)
+
+    async def _ensure_worker(self, index: int, loop: asyncio.AbstractEventLoop) -> _Worker:
+        """确保指定槽位有存活的工作进程"""
+        worker = self._slots[index]
+        if worker and worker.is_alive():
+            return worker
+        if worker:
+            # 进程意外退出
+            self.restarts += 1
+            await loop.run_in_executor(self._ipc_executor, worker.kill)
+        worker = await loop.run_in_executor(self._ipc_executor, self._spawn_worker)
+        self._slots[index] = worker
+        return worker
+
+    async def _replace_worker(self, index: int, loop: asyncio.AbstractEventLoop):
+        """终止指定槽位的工作进程并启动新的进程"""
+        worker = self._slots[index]
+        self._slots[index] = None
+        if worker:
+            await loop.run_in_executor(self._ipc_executor, worker.kill)
+        self.restarts += 1
+        try:
+            self._slots[index] = await loop.run_in_executor(self._ipc_executor, self._spawn_worker)
+        except Exception as e:
+            # 下一个任务到来时会再次尝试启动
+            logger.error(f"渲染进程重启失败: {e}")
+
+    def _spawn_worker(self) -> _Worker:
+        """启动工作进程并等待其完成预热（阻塞，在线程池中执行）"""
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(target=worker_main, args=(child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+        worker = _Worker(process, parent_conn)
+
+        if not parent_conn.poll(WORKER_START_TIMEOUT):
+            worker.kill()
+            raise RuntimeError("渲染进程启动超时")
+        status, _ = parent_conn.recv()
+        if status != "ready":
+            worker.kill()
+            raise RuntimeError("渲染进程启动失败")
+        return worker
+
+    @staticmethod
+    def _exchange(worker: _Worker, payload: tuple, timeout: float) -> Optional[tuple]:
+        """发送任务并等待结果（阻塞，在线程池中执行），超时返回None"""
+        worker.conn.send(payload)
+        if not worker.conn.poll(timeout):
+            return None
+        return worker.conn.recv()
+
+    @staticmethod
+    def _stop_worker(worker: _Worker):
+        """通知工作进程退出，未及时退出则强制终止"""
+        try:
+            worker.conn.send(None)
+        except OSError:
+            pass
+        worker.process.join(timeout=2)
+        worker.kill()
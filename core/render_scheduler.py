@@ -0,0 +1,152 @@
+"""渲染调度模块"""
+
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+
+class RenderOverloadError(RuntimeError):
+    """渲染队列已满，请求被拒绝"""
+
+
+class RenderScheduler:
+    """
+    渲染准入控制与公平调度器
+
+    限制同时进行的渲染数量，超出的请求按队列键（平台+群聊）分别排队，释放名额时在各队列之间轮转，
+    一个刷屏的群无法独占渲染能力；排队数量达到上限时直接拒绝（削峰），
+    避免繁忙时大量请求堆积导致所有人都等到超时。
+    """
+
+    def __init__(self, max_inflight: int = 4, max_queue: int = 16, max_queue_per_key: Optional[int] = None):
+        """
+        Args:
+            max_inflight: 最大同时渲染数
+            max_queue: 最大排队总数，为0时不排队
+            max_queue_per_key: 单个队列键的最大排队数，默认与 max_queue 相同
+        """
+        self.max_inflight = max(1, max_inflight)
+        self.max_queue = max(0, max_queue)
+        self.max_queue_per_key = self.max_queue if max_queue_per_key is None else max(0, max_queue_per_key)
+        self._inflight = 0
+        # 队列键 -> 等待者，按轮转顺序排列
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._queued = 0
+
+        # 统计信息
+        self.admitted = 0
+        self.shed = 0
+
+    @property
+    def inflight(self) -> int:
+        """正在渲染的请求数"""
+        return self._inflight
+
+    @property
+    def queued(self) -> int:
+        """排队中的请求数"""
+        return self._queued
+
+    def is_saturated(self, key: str = "") -> bool:
+        """渲染和排队名额是否都已用尽（该队列键的新请求将被拒绝）"""
+        if self._inflight < self.max_inflight:
+            return False
+        queue = self._queues.get(key)
+        return self._queued >= self.max_queue or (queue is not None and len(queue) >= self.max_queue_per_key)
+
+    def reject(self):
+        """
+        记录并拒绝一个请求
+
+        Raises:
+            RenderOverloadError: 总是抛出
+        """
+        self.shed += 1
+        raise RenderOverloadError("表情包生成繁忙，请稍后再试")
+
+    async def acquire(self, key: str = ""):
+        """
+        获取渲染名额
+
+        Args:
+            key: 队列键，相同键的请求按到达顺序排队，不同键之间轮转
+
+        Raises:
+            RenderOverloadError: 排队已满时抛出
+        """
+        if self._inflight < self.max_inflight and not self._queued:
+            self._inflight += 1
+            self.admitted += 1
+            return
+
+        queue = self._queues.get(key)
+        if self._queued >= self.max_queue or (queue is not None and len(queue) >= self.max_queue_per_key):
+            self.reject()
+
+        if queue is None:
+            # 新的队列键排在轮转顺序末尾
+            queue = self._queues[key] = deque()
+        future = asyncio.get_running_loop().create_future()
+        queue.append(future)
+        self._queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 名额已移交给本请求，转交给下一个等待者
+                self.release()
+            else:
+                self._discard(key, future)
+            raise
+        self.admitted += 1
+
+    def _discard(self, key: str, future: asyncio.Future):
+        """移除已取消的等待者"""
+        queue = self._queues.get(key)
+        if queue is None:
+            return
+        try:
+            queue.remove(future)
+        except ValueError:
+            return
+        self._queued -= 1
+        if not queue:
+            del self._queues[key]
+
+    def release(self):
+        """释放渲染名额，优先按轮转顺序直接移交给排队中的请求"""
+        while self._queues:
+            key, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            self._queued -= 1
+            if queue:
+                # 该队列还有等待者，轮转到末尾
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            if not future.done():
+                future.set_result(None)
+                return
+        self._inflight -= 1
+
+    @asynccontextmanager
+    async def slot(self, key: str = "") -> AsyncIterator[None]:
+        """在渲染名额内执行代码块"""
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取调度统计信息"""
+        return {
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "inflight": self._inflight,
+            "queued": self._queued,
+            "queue_keys": len(self._queues),
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
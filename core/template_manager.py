@@ -1,108 +1,164 @@
 """模板管理模块"""
 
 import asyncio
-from typing import List, Optional
+from typing import FrozenSet, Iterable, List, Optional, Tuple
 from meme_generator import Meme, get_memes
 from astrbot.api import logger
 
+from ..utils import InstrumentedExecutor
+
+from .keyword_matcher import MATCH_MODE_EXACT
+from .template_registry import TemplateRegistry
+from .template_spec import TemplateSpec
+
 
 class TemplateManager:
     """表情包模板管理器"""
 
-    def __init__(self):
-        self._memes: Optional[List[Meme]] = None
-        self._meme_keywords: Optional[List[str]] = None
-        self._loading = False
+    def __init__(
+            self,
+            disabled_templates: Iterable[str] = (),
+            match_mode: str = MATCH_MODE_EXACT,
+            executor: Optional[InstrumentedExecutor] = None
+    ):
+        self._disabled: FrozenSet[str] = frozenset(disabled_templates)
+        self._match_mode = match_mode
+        # 加载模板使用的线程池，未指定时使用事件循环默认线程池
+        self._executor = executor
         self._load_lock = asyncio.Lock()
 
+        # 当前生效的注册表快照，只会被整体替换
+        self._registry: TemplateRegistry = TemplateRegistry.empty(match_mode)
+
         # 尝试立即加载，但不阻塞初始化
         try:
             self._load_templates_sync()
         except Exception as e:
             logger.warning(f"初始化时加载模板失败，将使用懒加载: {e}")
 
+    def _build_registry_sync(self) -> Optional[TemplateRegistry]:
+        """获取模板并构建新的注册表快照，未获取到模板时返回None"""
+        memes = get_memes()
+        if not memes:
+            return None
+        return TemplateRegistry.build(memes, self._disabled, self._match_mode, self._registry.version + 1)
+
+    def _swap_registry(self, registry: TemplateRegistry):
+        """原子替换注册表快照"""
+        # 构建期间禁用列表可能已变化（版本号也随之递增），以最新的为准
+        if registry.disabled != self._disabled or registry.version <= self._registry.version:
+            registry = registry.with_disabled(self._disabled, self._registry.version + 1)
+        self._registry = registry
+
     def _load_templates_sync(self):
         """同步加载模板（用于初始化时的尝试）"""
-        memes = get_memes()
-        if memes:  # 只有在成功获取到模板时才更新
-            self._memes = memes
-            self._meme_keywords = [
-                keyword for meme in memes for keyword in meme.info.keywords
-            ]
-            logger.debug(f"📦 成功加载 {len(memes)} 个表情包模板")
+        registry = self._build_registry_sync()
+        if registry:  # 只有在成功获取到模板时才更新
+            self._swap_registry(registry)
+            logger.debug(f"📦 成功加载 {len(registry.memes)} 个表情包模板")
         else:
             logger.warning("未能加载到任何表情包模板")
 
+    async def _load_templates(self) -> bool:
+        """在线程池中构建新快照并替换，旧快照在此期间照常提供服务"""
+        try:
+            if self._executor:
+                registry = await self._executor.run(self._build_registry_sync)
+            else:
+                registry = await asyncio.to_thread(self._build_registry_sync)
+        except Exception as e:
+            logger.error(f"重新加载表情包模板失败: {e}")
+            return False
+
+        if not registry:
+            logger.error("重新加载失败：未能获取到任何模板")
+            return False
+
+        self._swap_registry(registry)
+        logger.debug(f"✅ 模板重新加载成功，共 {len(registry.memes)} 个表情包模板 (版本 {registry.version})")
+        return True
+
     async def _ensure_templates_loaded(self):
         """确保模板已加载（懒加载机制）"""
-        if self._memes is not None:
+        if self._registry.loaded:
             return
 
         async with self._load_lock:
             # 双重检查锁定模式
-            if self._memes is not None:
-                return
-
-            if self._loading:
-                # 如果正在加载，等待一段时间后重试
-                await asyncio.sleep(0.1)
+            if self._registry.loaded:
                 return
 
-            self._loading = True
-            try:
-                # 使用 asyncio.to_thread 在线程池中执行同步操作
-                memes = await asyncio.to_thread(get_memes)
-                if memes:
-                    self._memes = memes
-                    self._meme_keywords = [
-                        keyword for meme in memes for keyword in meme.info.keywords
-                    ]
-                    logger.debug(f"✅ 模板重新加载成功，共 {len(memes)} 个表情包模板")
-                else:
-                    logger.error("重新加载失败：未能获取到任何模板")
-                    # 设置空列表避免重复加载
-                    self._memes = []
-                    self._meme_keywords = []
-            except Exception as e:
-                logger.error(f"重新加载表情包模板失败: {e}")
-                # 设置空列表避免重复加载
-                self._memes = []
-                self._meme_keywords = []
-            finally:
-                self._loading = False
+            if not await self._load_templates():
+                # 标记为已加载的空注册表，避免每条消息都重复加载
+                self._swap_registry(TemplateRegistry.build(
+                    [], self._disabled, self._match_mode, self._registry.version + 1
+                ))
 
     async def refresh_templates(self):
         """手动刷新模板列表（用于资源检查完成后调用）"""
         async with self._load_lock:
-            self._memes = None
-            self._meme_keywords = None
-        await self._ensure_templates_loaded()
+            await self._load_templates()
+
+    def set_disabled_templates(self, disabled_templates: Iterable[str]):
+        """
+        更新禁用模板列表
+
+        Args:
+            disabled_templates: 被禁用的模板关键词
+        """
+        self._disabled = frozenset(disabled_templates)
+        self._registry = self._registry.with_disabled(self._disabled, self._registry.version + 1)
+
+    @property
+    def registry(self) -> TemplateRegistry:
+        """当前生效的注册表快照"""
+        return self._registry
+
+    @property
+    def version(self) -> int:
+        """注册表版本号，每次替换快照时递增"""
+        return self._registry.version
+
+    @property
+    def is_ready(self) -> bool:
+        """是否已加载到可用模板"""
+        return self._registry.ready
 
     @property
     def memes(self) -> List[Meme]:
         """获取模板列表（同步属性，用于向后兼容）"""
-        return self._memes or []
+        return list(self._registry.memes)
 
     @property
     def meme_keywords(self) -> List[str]:
         """获取关键词列表（同步属性，用于向后兼容）"""
-        return self._meme_keywords or []
+        return list(self._registry.keywords)
 
     async def find_meme(self, keyword: str) -> Optional[Meme]:
         """
         根据关键词查找表情包模板
 
         Args:
-            keyword: 关键词
+            keyword: 关键词或模板key
 
         Returns:
             找到的表情包模板，未找到返回None
         """
+        spec = await self.find_spec(keyword)
+        return spec.meme if spec else None
+
+    async def find_spec(self, keyword: str) -> Optional[TemplateSpec]:
+        """
+        根据关键词查找模板元数据
+
+        Args:
+            keyword: 关键词或模板key
+
+        Returns:
+            找到的模板元数据，未找到返回None
+        """
         await self._ensure_templates_loaded()
-        for meme in self.memes:
-            if keyword == meme.key or any(k == keyword for k in meme.info.keywords):
-                return meme
-        return None
+        return self._registry.lookup.get(keyword)
 
     async def find_keyword(self, message_str: str) -> Optional[str]:
         """
@@ -116,22 +172,40 @@ class TemplateManager:
         """
         await self._ensure_templates_loaded()
         # 精确匹配：检查关键词是否等于消息字符串的第一个单词
-        words = message_str.split()
-        if not words:
+        words = message_str.split(None, 1)
+        if not words or words[0] not in self._registry.keyword_index:
             return None
-        return next((k for k in self.meme_keywords if k == words[0]), None)
+        return words[0]
+
+    async def match_message(self, message_str: str) -> Optional[Tuple[str, TemplateSpec]]:
+        """
+        匹配消息对应的关键词和模板（已排除禁用模板）
+
+        Args:
+            message_str: 消息字符串
+
+        Returns:
+            (关键词, 模板元数据)，未匹配或模板被禁用返回None
+        """
+        await self._ensure_templates_loaded()
+        return self._registry.match(message_str)
 
     async def get_all_keywords(self) -> List[str]:
         """获取所有关键词"""
         await self._ensure_templates_loaded()
-        return self.meme_keywords.copy()
+        return self.meme_keywords
 
     async def get_all_memes(self) -> List[Meme]:
         """获取所有表情包模板"""
         await self._ensure_templates_loaded()
-        return self.memes.copy()
+        return self.memes
+
+    async def get_all_specs(self) -> List[TemplateSpec]:
+        """获取所有模板元数据"""
+        await self._ensure_templates_loaded()
+        return list(self._registry.specs)
 
     async def keyword_exists(self, keyword: str) -> bool:
         """检查关键词是否存在"""
         await self._ensure_templates_loaded()
-        return keyword in self.meme_keywords
+        return keyword in self._registry.keyword_index
@@ -0,0 +1,133 @@
+"""模板注册表模块"""
+
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from meme_generator import Meme
+
+from .keyword_matcher import KeywordMatcher, MATCH_MODE_EXACT
+from .template_spec import TemplateSpec
+
+
+class TemplateRegistry:
+    """
+    模板注册表快照
+
+    每次加载模板时整体构建一份新快照，构建完成后由 TemplateManager 以单次赋值原子替换。
+    快照创建后不再修改，读取方无需加锁，也不会看到加载到一半的状态。
+    """
+
+    __slots__ = (
+        "version",
+        "loaded",
+        "memes",
+        "specs",
+        "keywords",
+        "disabled",
+        "match_mode",
+        "lookup",
+        "keyword_index",
+        "dispatch",
+        "matcher",
+    )
+
+    def __init__(
+            self,
+            version: int,
+            loaded: bool,
+            memes: Tuple[Meme, ...],
+            specs: Tuple[TemplateSpec, ...],
+            keywords: Tuple[str, ...],
+            disabled: FrozenSet[str],
+            match_mode: str,
+            lookup: Dict[str, TemplateSpec],
+            keyword_index: Dict[str, TemplateSpec],
+    ):
+        self.version = version
+        self.loaded = loaded
+        self.memes = memes
+        self.specs = specs
+        self.keywords = keywords
+        self.disabled = disabled
+        self.match_mode = match_mode
+        # lookup: 关键词/模板key -> 模板（用于 find_meme）
+        # keyword_index: 关键词 -> 模板（用于消息匹配）
+        # dispatch: 已剔除禁用关键词的 keyword_index（用于生成主流程）
+        self.lookup = lookup
+        self.keyword_index = keyword_index
+        self.dispatch: Dict[str, TemplateSpec] = {
+            keyword: spec
+            for keyword, spec in keyword_index.items()
+            if keyword not in disabled
+        }
+        self.matcher = KeywordMatcher(self.dispatch, match_mode)
+
+    @classmethod
+    def empty(cls, match_mode: str = MATCH_MODE_EXACT) -> "TemplateRegistry":
+        """创建尚未加载任何模板的空注册表"""
+        return cls(0, False, (), (), (), frozenset(), match_mode, {}, {})
+
+    @classmethod
+    def build(
+            cls,
+            memes: List[Meme],
+            disabled: Iterable[str],
+            match_mode: str,
+            version: int,
+    ) -> "TemplateRegistry":
+        """
+        根据模板列表构建注册表（同步操作，建议在线程池中执行）
+
+        Args:
+            memes: 模板列表
+            disabled: 被禁用的模板关键词
+            match_mode: 关键词匹配模式
+            version: 注册表版本号
+
+        Returns:
+            新的注册表快照
+        """
+        specs = tuple(TemplateSpec.from_meme(meme) for meme in memes)
+        lookup: Dict[str, TemplateSpec] = {}
+        keyword_index: Dict[str, TemplateSpec] = {}
+        keywords: List[str] = []
+        for spec in specs:
+            keywords.extend(spec.keywords)
+            # 与原先的线性扫描保持一致：先出现的模板优先
+            lookup.setdefault(spec.key, spec)
+            for keyword in spec.keywords:
+                lookup.setdefault(keyword, spec)
+                keyword_index.setdefault(keyword, spec)
+
+        return cls(
+            version,
+            True,
+            tuple(memes),
+            specs,
+            tuple(keywords),
+            frozenset(disabled),
+            match_mode,
+            lookup,
+            keyword_index,
+        )
+
+    def with_disabled(self, disabled: Iterable[str], version: int) -> "TemplateRegistry":
+        """基于当前快照生成使用新禁用列表的快照，模板数据共享不复制"""
+        return TemplateRegistry(
+            version,
+            self.loaded,
+            self.memes,
+            self.specs,
+            self.keywords,
+            frozenset(disabled),
+            self.match_mode,
+            self.lookup,
+            self.keyword_index,
+        )
+
+    @property
+    def ready(self) -> bool:
+        """是否已加载到可用模板"""
+        return bool(self.memes)
+
+    def match(self, message_str: str) -> Optional[Tuple[str, TemplateSpec]]:
+        """匹配消息对应的关键词和模板（已排除禁用模板）"""
+        return self.matcher.match(message_str)
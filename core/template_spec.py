@@ -0,0 +1,85 @@
+"""模板元数据模块"""
+
+from typing import FrozenSet, Mapping, Tuple
+from meme_generator import Meme
+
+
+class TemplateSpec:
+    """
+    模板元数据（纯 Python 对象）
+
+    在加载模板时从 meme.info 读取一次，之后的查找、参数收集、信息展示都只访问这里，
+    避免每次请求都跨 FFI 边界重新构造 info/params 对象。只有最终生成时才使用 meme。
+    """
+
+    __slots__ = (
+        "key",
+        "keywords",
+        "tags",
+        "min_images",
+        "max_images",
+        "min_texts",
+        "max_texts",
+        "default_texts",
+        "option_names",
+        "random_options",
+        "meme",
+    )
+
+    def __init__(
+            self,
+            key: str,
+            keywords: Tuple[str, ...],
+            tags: Tuple[str, ...],
+            min_images: int,
+            max_images: int,
+            min_texts: int,
+            max_texts: int,
+            default_texts: Tuple[str, ...],
+            option_names: FrozenSet[str],
+            random_options: FrozenSet[str],
+            meme: Meme,
+    ):
+        self.key = key
+        self.keywords = keywords
+        self.tags = tags
+        self.min_images = min_images
+        self.max_images = max_images
+        self.min_texts = min_texts
+        self.max_texts = max_texts
+        self.default_texts = default_texts
+        self.option_names = option_names
+        # 没有默认值的选项，未设置时由模板随机选择（如随机素材）
+        self.random_options = random_options
+        self.meme = meme
+
+    @property
+    def uses_user_info(self) -> bool:
+        """模板是否使用用户昵称或性别选项"""
+        return "name" in self.option_names or "gender" in self.option_names
+
+    def is_deterministic(self, options: Mapping[str, object]) -> bool:
+        """相同输入是否总是生成相同结果（所有没有默认值的选项都已设置）"""
+        return all(name in options for name in self.random_options)
+
+    @classmethod
+    def from_meme(cls, meme: Meme) -> "TemplateSpec":
+        """从模板对象读取元数据"""
+        info = meme.info
+        params = info.params
+        return cls(
+            meme.key,
+            tuple(info.keywords),
+            tuple(info.tags),
+            params.min_images,
+            params.max_images,
+            params.min_texts,
+            params.max_texts,
+            tuple(params.default_texts),
+            frozenset(option.name for option in params.options),
+            frozenset(option.name for option in params.options if option.default is None),
+            meme,
+        )
+
+    def __repr__(self) -> str:
+        return f"TemplateSpec(key={self.key!r}, keywords={self.keywords!r})"
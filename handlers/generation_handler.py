@@ -3,7 +3,7 @@
 from astrbot.core.platform import AstrMessageEvent
 import astrbot.core.message.components as Comp
 from astrbot.api import logger
-from ..core import MemeManager
+from ..core import MemeManager, RenderOverloadError
 
 
 class GenerationHandler:
@@ -30,6 +30,11 @@ class GenerationHandler:
 
                 chain = [Comp.Image.fromBytes(image)]
                 yield event.chain_result(chain)
+        except RenderOverloadError:
+            # 渲染繁忙被拒绝，按配置静默或简短提示
+            logger.warning(f"表情包生成繁忙，已拒绝请求 - 用户: {event.get_sender_id()}")
+            if reply := self.meme_manager.config.overload_reply:
+                yield event.plain_result(reply)
         except Exception as e:
             # 记录生成失败的日志
             user_id = event.get_sender_id()
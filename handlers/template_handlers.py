@@ -55,6 +55,7 @@ class TemplateHandlers:
             return
 
         if self.config.disable_template(template_name):
+            self.meme_manager.template_manager.set_disabled_templates(self.config.disabled_templates)
             yield event.plain_result(f"✅ 已禁用模板: {template_name}")
         else:
             yield event.plain_result(f"❌ 禁用模板失败: {template_name}")
@@ -74,6 +75,7 @@ class TemplateHandlers:
             return
 
         if self.config.enable_template(template_name):
+            self.meme_manager.template_manager.set_disabled_templates(self.config.disabled_templates)
             yield event.plain_result(f"✅ 已启用模板: {template_name}")
         else:
             yield event.plain_result(f"❌ 启用模板失败: {template_name}")
@@ -65,6 +65,10 @@ class MemeGeneratorPlugin(Star):
         await self.cleanup()
         return False  # 不抑制异常
 
+    async def terminate(self):
+        """插件被禁用、重载或卸载时由框架调用 - 清理资源"""
+        await self.cleanup()
+
     async def cleanup(self):
         """清理资源"""
         try:
@@ -73,6 +77,12 @@ class MemeGeneratorPlugin(Star):
         except (AttributeError, RuntimeError) as e:
             logger.error(f"清理缓存管理器时出错: {e}")
 
+        try:
+            # 关闭渲染后端
+            await self.meme_manager.close()
+        except (AttributeError, RuntimeError) as e:
+            logger.error(f"关闭渲染后端时出错: {e}")
+
     @filter.command("表情帮助", alias={"meme帮助", "meme菜单"})
     async def meme_help_menu(self, event: AstrMessageEvent):
         """查看meme插件帮助菜单"""
@@ -200,6 +210,9 @@ class MemeGeneratorPlugin(Star):
         except Exception:
             pass
 
+        # 获取渲染、输入规范化、后处理与维护线程池状态
+        executor_stats = self.meme_manager.get_executor_stats()
+
         # 尝试加载外部模板
         template_content = template_loader.load_template("meme_info.html")
 
@@ -216,6 +229,17 @@ class MemeGeneratorPlugin(Star):
             "disabled_templates_count": len(self.meme_config.disabled_templates),
             "total_templates": total_templates,
             "total_keywords": total_keywords,
+            "templates_ready": self.meme_manager.template_manager.is_ready,
+            "template_version": self.meme_manager.template_manager.version,
+            "render_stats": executor_stats["render"],
+            "input_stats": executor_stats["input"],
+            "output_stats": executor_stats["output"],
+            "maintenance_stats": executor_stats["maintenance"],
+            "scheduler_stats": self.meme_manager.render_scheduler.get_stats(),
+            "flight_stats": self.meme_manager.render_flight.get_stats(),
+            "result_cache_stats": (
+                self.meme_manager.result_cache.get_stats() if self.meme_manager.result_cache else None
+            ),
             "version": metadata.get("version", "v1.1.0"),
             "author": metadata.get("author", "SodaSizzle")
         }
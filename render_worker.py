@@ -0,0 +1,110 @@
+"""
+渲染工作进程模块
+
+多进程渲染后端的子进程只导入本模块。本模块只依赖 meme_generator，不得导入插件的其他模块或 astrbot：
+插件包的 __init__ 会间接初始化 astrbot.core（配置、数据库、向量库等），在每个工作进程中重复初始化
+既拖慢启动，也可能与主进程争用数据文件。
+"""
+
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Tuple, Union
+from meme_generator import (
+    Meme,
+    DeserializeError,
+    ImageAssetMissing,
+    ImageDecodeError,
+    ImageEncodeError,
+    ImageNumberMismatch,
+    MemeFeedback,
+    TextNumberMismatch,
+    TextOverLength,
+    get_memes,
+)
+from meme_generator import Image as MemeImage
+
+
+def describe_generate_error(result: Any) -> str:
+    """
+    将生成引擎返回的错误对象转换为错误描述
+
+    Args:
+        result: meme.generate 的非 bytes 返回值
+
+    Returns:
+        错误描述
+    """
+    if result is None:
+        return "生成结果为空"
+    elif isinstance(result, ImageDecodeError):
+        return f"图片解码失败：{result.error}"
+    elif isinstance(result, ImageEncodeError):
+        return f"图片编码失败：{result.error}"
+    elif isinstance(result, ImageAssetMissing):
+        return f"缺少图片资源：{result.path}"
+    elif isinstance(result, DeserializeError):
+        return f"参数解析失败：{result.error}"
+    elif isinstance(result, ImageNumberMismatch):
+        num = (
+            f"{result.min} ~ {result.max}"
+            if result.min != result.max
+            else str(result.min)
+        )
+        return f"图片数量不符，应为 {num}，实际传入 {result.actual}"
+    elif isinstance(result, TextNumberMismatch):
+        num = (
+            f"{result.min} ~ {result.max}"
+            if result.min != result.max
+            else str(result.min)
+        )
+        return f"文字数量不符，应为 {num}，实际传入 {result.actual}"
+    elif isinstance(result, TextOverLength):
+        text = result.text
+        repr_text = text if len(text) <= 10 else (text[:10] + "...")
+        return f"文字过长：{repr_text}"
+    elif isinstance(result, MemeFeedback):
+        return result.feedback
+    return f"未知的生成结果类型：{type(result).__name__}"
+
+
+def generate_sync(
+        meme: Meme,
+        images: List[Tuple[str, bytes]],
+        texts: List[str],
+        options: Dict[str, Union[bool, str, int, float]]
+) -> Any:
+    """在当前线程中调用生成引擎，返回引擎的原始结果"""
+    meme_images = [MemeImage(name, data) for name, data in images]
+    return meme.generate(meme_images, texts, options)
+
+
+def worker_main(conn: Connection):
+    """
+    渲染工作进程入口
+
+    启动时预先加载全部模板，随后循环接收 (模板key, 图片, 文本, 选项) 并返回
+    ("ok", bytes) 或 ("error", 错误描述)。收到 None 或管道关闭时退出。
+    """
+    memes = {meme.key: meme for meme in get_memes()}
+    conn.send(("ready", len(memes)))
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+
+        key, images, texts, options = job
+        try:
+            meme = memes.get(key)
+            if meme is None:
+                conn.send(("error", f"未找到表情包模板：{key}"))
+                continue
+            result = generate_sync(meme, images, texts, options)
+            if isinstance(result, bytes):
+                conn.send(("ok", result))
+            else:
+                conn.send(("error", describe_generate_error(result)))
+        except Exception as e:
+            conn.send(("error", f"渲染进程异常：{e}"))
@@ -0,0 +1,16 @@
+"""测试公共设置"""
+
+import os
+import shutil
+import tempfile
+
+# 导入插件会间接导入 astrbot.core，后者在当前工作目录下创建 data/cmd_config.json 等文件，
+# 在导入任何测试模块之前切换到临时目录，避免写入仓库目录
+_ORIGINAL_CWD = os.getcwd()
+_WORK_DIR = tempfile.mkdtemp(prefix="meme_generator_tests_")
+os.chdir(_WORK_DIR)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    os.chdir(_ORIGINAL_CWD)
+    shutil.rmtree(_WORK_DIR, ignore_errors=True)
@@ -0,0 +1,113 @@
+"""NetworkUtils 下载限制测试（使用本地 HTTP 服务）"""
+
+import asyncio
+import importlib
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+
+PLUGIN_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PLUGIN_DIR.parent))
+network_utils_module = importlib.import_module(f"{PLUGIN_DIR.name}.utils.network_utils")
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 1024
+MAX_BYTES = 64 * 1024
+
+
+async def _stream(request: web.Request, body_prefix: bytes, content_type: str, chunks: int) -> web.StreamResponse:
+    """分块返回响应体且不声明 Content-Length"""
+    response = web.StreamResponse(headers={"Content-Type": content_type})
+    await response.prepare(request)
+    await response.write(body_prefix)
+    for _ in range(chunks):
+        await response.write(b"\0" * 16 * 1024)
+        await asyncio.sleep(0)
+    return response
+
+
+async def _ok(_request):
+    return web.Response(body=PNG, content_type="image/png")
+
+
+async def _declared_too_large(_request):
+    return web.Response(body=PNG + b"\0" * MAX_BYTES, content_type="image/png")
+
+
+async def _streamed_too_large(request):
+    # 约 16 MB，客户端应在超出限制后立即中止
+    return await _stream(request, PNG, "image/png", 1024)
+
+
+async def _html(_request):
+    return web.Response(text="<html></html>", content_type="text/html")
+
+
+async def _not_an_image(request):
+    return await _stream(request, b"not an image at all, just bytes", "application/octet-stream", 4)
+
+
+async def _slow(_request):
+    await asyncio.sleep(2)
+    return web.Response(body=PNG, content_type="image/png")
+
+
+async def _download(path: str, request_timeout: float = 5) -> tuple[bytes | None, float]:
+    """启动本地服务并通过 NetworkUtils 下载指定路径，返回 (下载结果, 下载耗时)"""
+    app = web.Application()
+    for route, handler in {
+        "/ok": _ok,
+        "/declared": _declared_too_large,
+        "/streamed": _streamed_too_large,
+        "/html": _html,
+        "/garbage": _not_an_image,
+        "/slow": _slow,
+    }.items():
+        app.router.add_get(route, handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    port = runner.addresses[0][1]
+
+    network_utils = network_utils_module.NetworkUtils(request_timeout=request_timeout, max_download_bytes=MAX_BYTES)
+    try:
+        start = time.perf_counter()
+        result = await network_utils.download_image(f"http://127.0.0.1:{port}{path}")
+        return result, time.perf_counter() - start
+    finally:
+        await network_utils.close()
+        await runner.cleanup()
+
+
+def test_download_image():
+    result, _ = asyncio.run(_download("/ok"))
+    assert result == PNG
+
+
+def test_reject_declared_oversize():
+    result, _ = asyncio.run(_download("/declared"))
+    assert result is None
+
+
+def test_abort_streamed_oversize():
+    result, elapsed = asyncio.run(_download("/streamed"))
+    assert result is None
+    assert elapsed < 1
+
+
+def test_reject_non_image_content_type():
+    result, _ = asyncio.run(_download("/html"))
+    assert result is None
+
+
+def test_reject_unknown_magic_bytes():
+    result, _ = asyncio.run(_download("/garbage"))
+    assert result is None
+
+
+def test_total_deadline():
+    result, elapsed = asyncio.run(_download("/slow", request_timeout=0.5))
+    assert result is None
+    assert elapsed < 1.5
@@ -7,5 +7,8 @@ from .cooldown_manager import CooldownManager
 from .avatar_cache import AvatarCache
 from .cache_manager import CacheManager
 from .permission_utils import PermissionUtils
+from .executor_utils import InstrumentedExecutor
+from .single_flight import SingleFlight
+from .result_cache import ResultCache
 
-__all__ = ["ImageUtils", "NetworkUtils", "PlatformUtils", "CooldownManager", "AvatarCache", "CacheManager", "PermissionUtils"]
+__all__ = ["ImageUtils", "NetworkUtils", "PlatformUtils", "CooldownManager", "AvatarCache", "CacheManager", "PermissionUtils", "InstrumentedExecutor", "SingleFlight", "ResultCache"]
@@ -1,53 +1,323 @@
 """头像缓存管理模块"""
 
+import asyncio
 import os
+import string
 import time
-import json
 import hashlib
-import pickle
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 from astrbot.api import logger
+from .avatar_index import AvatarIndex, IndexEntry, RemovedEntry
+from .executor_utils import InstrumentedExecutor
 
 
-class AvatarCache:
-    """头像缓存管理器"""
+# 索引数据库文件名
+INDEX_FILE_NAME = "index.sqlite3"
+# 磁盘读写线程数
+AVATAR_IO_WORKERS = 2
+# 超出容量时淘汰到容量的该比例，留出余量，避免缓存已满时每次写入都触发淘汰
+EVICT_TARGET_RATIO = 0.9
+# 打开索引失败后首次重试的等待时间(秒)，之后每次失败翻倍
+OPEN_RETRY_DELAY = 5.0
+# 打开索引失败后重试的最长等待时间(秒)
+OPEN_RETRY_MAX_DELAY = 600.0
+
+# 缓存文件可能的扩展名
+CACHE_FILE_EXTENSIONS = (".jpg", ".png", ".gif", ".bmp", ".webp")
+
+# 磁盘存储布局
+CACHE_LAYOUT_FLAT = "flat"        # 所有文件放在缓存目录下
+CACHE_LAYOUT_SHARDED = "sharded"  # 按缓存键（MD5）前两位分散到 256 个子目录
+CACHE_LAYOUTS = (CACHE_LAYOUT_FLAT, CACHE_LAYOUT_SHARDED)
 
-    def __init__(self, cache_expire_hours: int = 24, enable_cache: bool = True, cache_dir: str = "data/cache/avatars"):
+
+class AvatarCache:
+    """
+    头像缓存管理器
+
+    磁盘缓存前有一层按字节预算淘汰的内存 LRU，活跃用户的头像直接从内存返回，过期时间与磁盘缓存一致。
+    在事件循环中使用 *_async 方法：磁盘和索引读写在专用的小线程池中进行，写入在后台完成（write-behind），
+    内存层和统计信息只在事件循环线程中访问。
+    索引在 start() 中于线程池里打开（包括导入旧版元数据、迁移存储布局和重新索引未记录的文件），*_async 方法会先等待其完成。
+    磁盘文件可以平铺在缓存目录下，也可以按缓存键前缀分散到子目录，切换布局时启动阶段会自动迁移已有文件。
+    """
+
+    def __init__(
+            self,
+            cache_expire_hours: int = 24,
+            enable_cache: bool = True,
+            cache_dir: str = "data/cache/avatars",
+            memory_bytes: int = 8 * 1024 * 1024,
+            max_bytes: int = 0,
+            layout: str = CACHE_LAYOUT_FLAT
+    ):
         self.cache_expire_hours = cache_expire_hours
         self.enable_cache = enable_cache
         self.cache_dir = Path(cache_dir)
         self.metadata_file = self.cache_dir / "metadata.json"
+        # 磁盘缓存总大小上限，超出时按最后访问时间淘汰，为0时不限制
+        self.max_bytes = max(0, max_bytes)
+        self.layout = layout if layout in CACHE_LAYOUTS else CACHE_LAYOUT_FLAT
+
+        # 内存层：缓存键 -> (写入时间, 头像数据)，按最近使用顺序排列
+        self.memory_bytes = max(0, memory_bytes)
+        self._memory: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._memory_size = 0
+
+        # 统计信息
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+        self.disk_evicted_bytes = 0
+
+        # 磁盘读写线程池和进行中的后台写入
+        self.executor = InstrumentedExecutor("meme_avatar_io", AVATAR_IO_WORKERS)
+        self._pending: Set[asyncio.Task] = set()
+
+        # 缓存索引，由 start() 在线程池中打开，打开完成前为None
+        self._index: Optional[AvatarIndex] = None
+        self._opening: Optional[asyncio.Task] = None
+        # 连续打开失败的次数和下一次允许重试的时间（time.monotonic()）
+        self._open_failures = 0
+        self._open_retry_at = 0.0
+
+    async def start(self):
+        """
+        在线程池中打开索引，不阻塞事件循环
 
+        首次调用时执行，之后的调用等待同一次打开完成。
+        打开失败时按指数退避等待后由之后的调用重试，等待期间直接返回，磁盘缓存不可用（只使用内存层）。
+        """
+        if not self.enable_cache:
+            return
+        if self._opening is None:
+            if time.monotonic() < self._open_retry_at:
+                return
+            self._opening = asyncio.ensure_future(self.executor.run(self._open_index))
+        opening = self._opening
+        try:
+            await asyncio.shield(opening)
+        except Exception as e:
+            # 同一次失败只由一个调用方处理
+            if self._opening is opening:
+                self._opening = None
+                self._open_failures += 1
+                delay = min(OPEN_RETRY_MAX_DELAY, OPEN_RETRY_DELAY * 2 ** (self._open_failures - 1))
+                self._open_retry_at = time.monotonic() + delay
+                logger.error(f"打开头像缓存索引失败，{delay:.0f} 秒后重试: {e}")
+        else:
+            self._open_failures = 0
+
+    def _open_index(self):
+        """创建缓存目录并打开索引，存在旧版 metadata.json 时导入，可在线程池中调用"""
+        if self._index is not None:
+            return
         # 创建缓存目录
-        if self.enable_cache:
-            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        index = AvatarIndex(str(self.cache_dir / INDEX_FILE_NAME))
+        try:
+            self._prepare_index(index)
+        except BaseException:
+            try:
+                index.close()
+            except Exception:
+                pass
+            raise
+        # 导入和迁移完成后才对外可见
+        self._index = index
+
+    def _prepare_index(self, index: AvatarIndex):
+        """导入旧版元数据、迁移存储布局并重新索引未记录的文件"""
+        if self.metadata_file.exists():
+            imported = index.import_json_metadata(self.metadata_file, self.cache_dir)
+            logger.info(f"已将 {imported} 条头像缓存元数据迁移到索引数据库")
+        # 旧版缓存没有记录布局，均为平铺
+        stored_layout = index.get_meta("layout") or CACHE_LAYOUT_FLAT
+        if stored_layout != self.layout:
+            moved = self._migrate_layout(index, stored_layout)
+            logger.info(f"已将 {moved} 个头像缓存文件从 {stored_layout} 布局迁移到 {self.layout} 布局")
+        index.set_meta("layout", self.layout)
+        # 进程异常退出时未写入索引的文件重新加入索引，否则既不会过期也不计入容量
+        orphans = self._reindex_orphans(index)
+        if orphans:
+            logger.info(f"已将 {orphans} 个未记录在索引中的头像缓存文件重新加入索引")
+
+    def _reindex_orphans(self, index: AvatarIndex) -> int:
+        """将缓存目录中没有索引条目的文件移动到当前布局下并加入索引（以修改时间为写入时间），返回处理的文件数"""
+        known = {cache_key for cache_key, _ in index.entries()}
+        found = 0
+        for path in self._scan_cache_files():
+            cache_key, ext = os.path.splitext(path.name)
+            if cache_key in known:
+                continue
+            dst = self._cache_file(cache_key, ext)
+            try:
+                if path != dst:
+                    dst.parent.mkdir(exist_ok=True)
+                    os.replace(path, dst)
+                stat = dst.stat()
+            except OSError as e:
+                logger.warning(f"重新索引头像缓存文件失败: {e}")
+                continue
+            index.put(cache_key, IndexEntry(stat.st_mtime, ext, stat.st_size))
+            known.add(cache_key)
+            found += 1
+        index.flush()
+        return found
+
+    def _scan_cache_files(self) -> List[Path]:
+        """缓存目录及分片子目录中所有名称为 <缓存键><扩展名> 的文件（不区分当前布局）"""
+        files: List[Path] = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_dir() and len(entry.name) == 2:
+                    with os.scandir(entry.path) as shard:
+                        files.extend(
+                            Path(item.path) for item in shard
+                            if self._is_cache_file_name(item.name) and item.is_file()
+                        )
+                elif self._is_cache_file_name(entry.name) and entry.is_file():
+                    files.append(Path(entry.path))
+        return files
+
+    @staticmethod
+    def _is_cache_file_name(name: str) -> bool:
+        cache_key, ext = os.path.splitext(name)
+        return ext in CACHE_FILE_EXTENSIONS and len(cache_key) == 32 and all(c in string.hexdigits for c in cache_key)
+
+    def _migrate_layout(self, index: AvatarIndex, old_layout: str) -> int:
+        """将索引中的文件从旧布局移动到当前布局，返回移动的文件数"""
+        moved = 0
+        old_dirs = set()
+        for cache_key, ext in index.entries():
+            src = self._layout_file(old_layout, cache_key, ext)
+            dst = self._cache_file(cache_key, ext)
+            try:
+                dst.parent.mkdir(exist_ok=True)
+                os.replace(src, dst)
+                moved += 1
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning(f"迁移头像缓存文件失败: {e}")
+                continue
+            old_dirs.add(src.parent)
+        # 移除迁移后变空的分片目录
+        for directory in old_dirs - {self.cache_dir}:
+            try:
+                directory.rmdir()
+            except OSError:
+                pass
+        return moved
+
+    async def flush(self):
+        """等待后台写入完成"""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def flush_index_async(self):
+        """写入索引中未写入的改动（在线程池中进行），由定时任务调用，缓存空闲时改动也能及时落盘"""
+        if self._index is not None:
+            await self.executor.run(self._index.flush)
+
+    async def close(self):
+        """等待后台写入完成，写入未保存的索引改动并关闭索引和线程池"""
+        if self._opening is not None:
+            await asyncio.gather(self._opening, return_exceptions=True)
+        await self.flush()
+        if self._index is not None:
+            index, self._index = self._index, None
+            await self.executor.run(index.close)
+        self.executor.shutdown()
+
+    async def get_avatar_async(self, user_id: str) -> Optional[bytes]:
+        """
+        从缓存获取头像（磁盘读取在线程池中进行）
+
+        Args:
+            user_id: 用户ID
 
-        # 加载元数据
-        self._metadata: Dict[str, float] = self._load_metadata()
+        Returns:
+            头像字节数据，未找到或过期返回None
+        """
+        if not self.enable_cache:
+            return None
 
-    def _load_metadata(self) -> Dict[str, float]:
-        """加载缓存元数据"""
-        if not self.enable_cache or not self.metadata_file.exists():
-            return {}
+        cache_key = self.get_cache_key(user_id)
+        data = self._get_memory(cache_key)
+        if data is not None:
+            return data
 
+        await self.start()
         try:
-            with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError, OSError) as e:
-            logger.warning(f"加载头像缓存元数据失败: {e}")
-            return {}
-
-    def _save_metadata(self):
-        """保存缓存元数据"""
+            cached = await self.executor.run(self._get_disk_avatar, cache_key)
+        except Exception as e:
+            logger.error(f"读取头像缓存失败: {e}")
+            cached = None
+        return self._record_disk_result(cache_key, cached)
+
+    async def set_avatar_async(self, user_id: str, avatar_data: bytes):
+        """
+        设置头像缓存，立即写入内存层，磁盘在后台写入，不等待写入完成
+
+        Args:
+            user_id: 用户ID
+            avatar_data: 头像字节数据
+        """
         if not self.enable_cache:
             return
 
-        try:
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self._metadata, f, ensure_ascii=False, indent=2)
-        except (OSError, json.JSONEncodeError) as e:
-            logger.error(f"保存头像缓存元数据失败: {e}")
+        cache_key = self.get_cache_key(user_id)
+        current_time = time.time()
+        self._put_memory(cache_key, current_time, avatar_data)
+        task = asyncio.create_task(self._write_behind(cache_key, avatar_data, current_time))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _write_behind(self, cache_key: str, avatar_data: bytes, timestamp: float):
+        """等待索引打开后在线程池中写入磁盘"""
+        await self.start()
+        await self.executor.run(self._write_disk, cache_key, avatar_data, timestamp)
+
+    async def clear_expired_cache_async(self) -> Tuple[int, int]:
+        """
+        清理过期的缓存（在线程池中进行）
+
+        Returns:
+            (清理的缓存数量, 释放的字节数)
+        """
+        if not self.enable_cache:
+            return 0, 0
+        await self.start()
+        await self.flush()
+        expired_keys, freed = await self.executor.run(self._clear_expired_disk)
+        for key in expired_keys:
+            self._drop_memory(key)
+        return len(expired_keys), freed
+
+    async def enforce_size_limit_async(self) -> Tuple[int, int]:
+        """
+        按最后访问时间淘汰磁盘缓存直到不超过容量（在线程池中进行）
+
+        Returns:
+            (淘汰的缓存数量, 释放的字节数)
+        """
+        if not self.enable_cache or not self.max_bytes:
+            return 0, 0
+        await self.start()
+        await self.flush()
+        evicted_keys, freed = await self.executor.run(self._evict_disk)
+        return len(evicted_keys), freed
+
+    async def get_cache_stats_async(self) -> Dict[str, Any]:
+        """获取缓存统计信息（索引查询在线程池中进行）"""
+        await self.start()
+        disk_stats = await self.executor.run(self._disk_stats)
+        return self._build_stats(*disk_stats)
 
     def get_cache_key(self, user_id: str) -> str:
         """
@@ -119,39 +389,103 @@ class AvatarCache:
 
         cache_key = self.get_cache_key(user_id)
 
-        # 查找对应的缓存文件（可能有不同的扩展名）
-        cache_file = None
-        possible_extensions = ['.jpg', '.png', '.gif', '.bmp', '.webp']
+        # 优先从内存层获取
+        data = self._get_memory(cache_key)
+        if data is not None:
+            return data
+        return self._record_disk_result(cache_key, self._get_disk_avatar(cache_key))
 
-        for ext in possible_extensions:
-            potential_file = self.cache_dir / f"{cache_key}{ext}"
-            if potential_file.exists():
-                cache_file = potential_file
-                break
+    def _get_memory(self, cache_key: str) -> Optional[bytes]:
+        """从内存层获取未过期的头像"""
+        cached = self._memory.get(cache_key)
+        if cached is None:
+            return None
+        timestamp, data = cached
+        if self._is_expired(timestamp):
+            self._drop_memory(cache_key)
+            return None
+        self._memory.move_to_end(cache_key)
+        self.memory_hits += 1
+        if self._index is not None:
+            self._index.touch(cache_key, time.time())
+        return data
+
+    def _record_disk_result(self, cache_key: str, cached: Optional[Tuple[float, bytes]]) -> Optional[bytes]:
+        """记录磁盘查询结果，命中时写入内存层"""
+        if cached is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._put_memory(cache_key, *cached)
+        return cached[1]
 
-        # 检查文件是否存在
-        if not cache_file or cache_key not in self._metadata:
+    def _is_expired(self, timestamp: float) -> bool:
+        """判断缓存是否过期"""
+        return (time.time() - timestamp) > self.cache_expire_hours * 3600
+
+    def _put_memory(self, cache_key: str, timestamp: float, data: bytes):
+        """写入内存层并按字节预算淘汰"""
+        if len(data) > self.memory_bytes:
+            return
+        self._drop_memory(cache_key)
+        self._memory[cache_key] = (timestamp, data)
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes:
+            _, (_, evicted) = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+            self.memory_evictions += 1
+
+    def _drop_memory(self, cache_key: str):
+        """移除内存层中的缓存"""
+        cached = self._memory.pop(cache_key, None)
+        if cached is not None:
+            self._memory_size -= len(cached[1])
+
+    def _get_disk_avatar(self, cache_key: str) -> Optional[Tuple[float, bytes]]:
+        """
+        从磁盘缓存读取头像，返回 (写入时间, 头像数据)，未找到或过期返回None
+
+        只访问索引和文件，可在线程池中调用。
+        """
+        if self._index is None:
             return None
 
-        # 检查是否过期
-        timestamp = self._metadata[cache_key]
-        current_time = time.time()
-        expire_time = self.cache_expire_hours * 3600  # 转换为秒
+        # 索引记录了文件扩展名，无需逐个探测文件是否存在
+        entry = self._index.get(cache_key)
+        if entry is None:
+            return None
 
-        if (current_time - timestamp) > expire_time:
+        # 检查是否过期
+        if self._is_expired(entry.timestamp):
             # 过期，删除缓存
-            self._remove_cache_file(cache_key)
+            self._remove_disk_entry(cache_key)
             return None
 
         # 读取头像数据
         try:
-            with open(cache_file, 'rb') as f:
-                return f.read()
+            with open(self._cache_file(cache_key, entry.ext), 'rb') as f:
+                data = f.read()
+            self._index.touch(cache_key, time.time())
+            return entry.timestamp, data
+        except FileNotFoundError:
+            # 文件已被外部删除
+            self._index.delete(cache_key)
+            return None
         except (OSError, IOError) as e:
             logger.error(f"读取头像缓存失败: {e}")
-            self._remove_cache_file(cache_key)
+            self._remove_disk_entry(cache_key)
             return None
 
+    def _cache_file(self, cache_key: str, ext: str) -> Path:
+        """缓存文件路径"""
+        return self._layout_file(self.layout, cache_key, ext)
+
+    def _layout_file(self, layout: str, cache_key: str, ext: str) -> Path:
+        """指定布局下的缓存文件路径"""
+        if layout == CACHE_LAYOUT_SHARDED:
+            return self.cache_dir / cache_key[:2] / f"{cache_key}{ext}"
+        return self.cache_dir / f"{cache_key}{ext}"
+
     def set_avatar(self, user_id: str, avatar_data: bytes):
         """
         设置头像缓存
@@ -164,47 +498,60 @@ class AvatarCache:
             return
 
         cache_key = self.get_cache_key(user_id)
+        current_time = time.time()
+        if self._write_disk(cache_key, avatar_data, current_time):
+            self._put_memory(cache_key, current_time, avatar_data)
+
+    def _write_disk(self, cache_key: str, avatar_data: bytes, timestamp: float) -> bool:
+        """写入缓存文件并更新索引，可在线程池中调用"""
+        if self._index is None:
+            return False
 
         # 检测图片格式并生成对应的文件名
         image_ext = self._detect_image_format(avatar_data)
-        cache_file = self.cache_dir / f"{cache_key}{image_ext}"
-        current_time = time.time()
+        cache_file = self._cache_file(cache_key, image_ext)
 
         try:
-            # 先删除可能存在的旧格式文件
-            self._remove_old_cache_files(cache_key)
+            # 先删除扩展名不同的旧文件（相同扩展名直接覆盖）
+            old_entry = self._index.get(cache_key)
+            if old_entry is not None and old_entry.ext != image_ext:
+                self._cache_file(cache_key, old_entry.ext).unlink(missing_ok=True)
 
             # 保存头像数据到文件
+            if self.layout == CACHE_LAYOUT_SHARDED:
+                cache_file.parent.mkdir(exist_ok=True)
             with open(cache_file, 'wb') as f:
                 f.write(avatar_data)
 
-            # 更新元数据
-            self._metadata[cache_key] = current_time
-            self._save_metadata()
+            # 更新索引，超出容量时淘汰最久未访问的缓存
+            self._index.put(cache_key, IndexEntry(timestamp, image_ext, len(avatar_data)))
+            if self.max_bytes:
+                self._evict_disk()
+            return True
 
         except (OSError, IOError) as e:
             logger.error(f"保存头像缓存失败: {e}")
             # 清理可能的部分文件
-            if cache_file.exists():
-                cache_file.unlink(missing_ok=True)
+            cache_file.unlink(missing_ok=True)
+            return False
 
-    def _remove_old_cache_files(self, cache_key: str):
-        """删除指定cache_key的所有可能格式的旧文件"""
-        possible_extensions = ['.jpg', '.png', '.gif', '.bmp', '.webp']
+    def _remove_cache_file(self, cache_key: str):
+        """移除缓存文件、索引条目和内存层中的缓存"""
+        self._drop_memory(cache_key)
+        self._remove_disk_entry(cache_key)
 
-        for ext in possible_extensions:
-            old_file = self.cache_dir / f"{cache_key}{ext}"
-            if old_file.exists():
-                old_file.unlink(missing_ok=True)
+    def _remove_disk_entry(self, cache_key: str):
+        """移除缓存文件和索引条目，可在线程池中调用"""
+        if self._index is None:
+            return
 
-    def _remove_cache_file(self, cache_key: str):
-        """移除缓存文件和元数据"""
-        # 删除所有可能格式的文件
-        self._remove_old_cache_files(cache_key)
+        # 按索引记录的扩展名删除文件
+        entry = self._index.get(cache_key)
+        if entry is not None:
+            self._cache_file(cache_key, entry.ext).unlink(missing_ok=True)
 
-        # 删除元数据
-        self._metadata.pop(cache_key, None)
-        self._save_metadata()
+        # 删除索引条目
+        self._index.delete(cache_key)
 
     def remove_avatar(self, user_id: str):
         """
@@ -213,6 +560,8 @@ class AvatarCache:
         Args:
             user_id: 用户ID
         """
+        if not self.enable_cache:
+            return
         cache_key = self.get_cache_key(user_id)
         self._remove_cache_file(cache_key)
 
@@ -221,55 +570,92 @@ class AvatarCache:
         if not self.enable_cache:
             return
 
-        current_time = time.time()
-        expire_time = self.cache_expire_hours * 3600
-        expired_keys = []
+        expired_keys, _ = self._clear_expired_disk()
+        for key in expired_keys:
+            self._drop_memory(key)
 
-        for cache_key, timestamp in self._metadata.items():
-            if (current_time - timestamp) > expire_time:
-                expired_keys.append(cache_key)
+    def _clear_expired_disk(self) -> Tuple[List[str], int]:
+        """
+        一次性删除所有过期的索引条目（单个事务），再批量删除文件，可在线程池中调用
 
-        for key in expired_keys:
-            self._remove_cache_file(key)
+        Returns:
+            (删除的缓存键, 释放的字节数)
+        """
+        if self._index is None:
+            return [], 0
+        removed = self._index.expire(time.time() - self.cache_expire_hours * 3600)
+        return self._unlink_entries(removed)
+
+    def _evict_disk(self) -> Tuple[List[str], int]:
+        """
+        超出容量时按最后访问时间淘汰缓存，直到不超过容量的 EVICT_TARGET_RATIO，可在线程池中调用
+
+        Returns:
+            (淘汰的缓存键, 释放的字节数)
+        """
+        if self._index is None:
+            return [], 0
+        removed = self._index.evict(self.max_bytes, int(self.max_bytes * EVICT_TARGET_RATIO))
+        keys, freed = self._unlink_entries(removed)
+        self.disk_evictions += len(keys)
+        self.disk_evicted_bytes += freed
+        return keys, freed
+
+    def _unlink_entries(self, removed: List[RemovedEntry]) -> Tuple[List[str], int]:
+        """删除已从索引中移除的条目对应的文件"""
+        for key, ext, _ in removed:
+            self._cache_file(key, ext).unlink(missing_ok=True)
+        return [key for key, _, _ in removed], sum(size for _, _, size in removed)
 
     def clear_all_cache(self):
         """清空所有缓存"""
         if not self.enable_cache:
             return
 
-        # 删除所有缓存文件
-        for cache_key in list(self._metadata.keys()):
-            self._remove_cache_file(cache_key)
+        # 删除所有缓存文件并清空索引
+        if self._index is not None:
+            for cache_key, ext in self._index.entries():
+                self._cache_file(cache_key, ext).unlink(missing_ok=True)
+            self._index.clear()
 
-        # 清空元数据
-        self._metadata.clear()
-        self._save_metadata()
+        # 清空内存层
+        self._memory.clear()
+        self._memory_size = 0
 
-    def get_cache_stats(self) -> Dict[str, int]:
+    def get_cache_stats(self) -> Dict[str, Any]:
         """
         获取缓存统计信息
 
         Returns:
             缓存统计信息字典
         """
-        # 计算缓存目录大小
-        total_size = 0
-        if self.cache_dir.exists():
-            # 统计所有图片格式的缓存文件
-            patterns = ["*.jpg", "*.png", "*.gif", "*.bmp", "*.webp"]
-            for pattern in patterns:
-                for file_path in self.cache_dir.glob(pattern):
-                    try:
-                        total_size += file_path.stat().st_size
-                    except OSError:
-                        pass
+        return self._build_stats(*self._disk_stats())
 
+    def _disk_stats(self) -> Tuple[int, int]:
+        """磁盘缓存的 (数量, 总大小)，由索引汇总，不扫描目录"""
+        if self._index is None:
+            return 0, 0
+        return self._index.count(), self._index.total_size()
+
+    def _build_stats(self, total_cached: int, total_size: int) -> Dict[str, Any]:
         return {
-            "total_cached": len(self._metadata),
+            "total_cached": total_cached,
             "cache_enabled": self.enable_cache,
             "expire_hours": self.cache_expire_hours,
             "cache_size_bytes": total_size,
-            "cache_dir": str(self.cache_dir)
+            "cache_limit_bytes": self.max_bytes,
+            "disk_evictions": self.disk_evictions,
+            "disk_evicted_bytes": self.disk_evicted_bytes,
+            "cache_dir": str(self.cache_dir),
+            "cache_layout": self.layout,
+            "memory_cached": len(self._memory),
+            "memory_bytes": self._memory_size,
+            "memory_limit": self.memory_bytes,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_evictions": self.memory_evictions,
+            "pending_writes": len(self._pending),
         }
 
     def update_settings(self, cache_expire_hours: int, enable_cache: bool):
@@ -285,6 +671,8 @@ class AvatarCache:
 
         if not enable_cache:
             self.clear_all_cache()
-        else:
-            # 如果启用缓存，确保目录存在
-            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        elif self._index is None:
+            # 如果启用缓存，下一次异步调用时在线程池中打开索引
+            self._opening = None
+            self._open_failures = 0
+            self._open_retry_at = 0.0
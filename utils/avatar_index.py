@@ -0,0 +1,295 @@
+"""头像缓存索引模块"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from astrbot.api import logger
+
+
+# 索引表结构版本（PRAGMA user_version）
+SCHEMA_VERSION = 3
+# 累计多少条改动后批量写入
+FLUSH_BATCH = 64
+# 距上次写入超过该时间(秒)后，下一次改动时批量写入
+FLUSH_INTERVAL = 5.0
+
+
+class IndexEntry(NamedTuple):
+    """索引条目"""
+    timestamp: float  # 写入时间
+    ext: str          # 文件扩展名
+    size: int         # 文件大小(字节)
+
+
+# 被删除的条目：(缓存键, 扩展名, 文件大小)
+RemovedEntry = Tuple[str, str, int]
+
+
+class AvatarIndex:
+    """
+    头像缓存索引（SQLite WAL）
+
+    每个缓存键一行，记录写入时间、扩展名、文件大小和最后访问时间，按主键查询和更新，不随缓存数量整体读写。
+    改动先记录在内存中，累计到一定数量或间隔后在一个事务中批量写入，查询时优先读取未写入的改动。
+    访问时间只记录在内存中，随下一次批量写入一起更新。
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: 索引数据库文件路径
+        """
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        # 未写入的改动：缓存键 -> 条目，None 表示删除
+        self._pending: Dict[str, Optional[IndexEntry]] = {}
+        # 未写入的访问时间：缓存键 -> 最后访问时间，使用单独的锁，记录访问时不等待数据库写入
+        self._touched: Dict[str, float] = {}
+        self._touch_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate_schema()
+        # 所有文件的总大小，随改动增量维护
+        self._total_size = self._sum_size()
+
+    def _migrate_schema(self):
+        """创建或升级索引表"""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS avatars ("
+                "key TEXT PRIMARY KEY, timestamp REAL NOT NULL, ext TEXT NOT NULL, size INTEGER NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_avatars_timestamp ON avatars (timestamp)")
+        if version < 2:
+            # 增加最后访问时间，用于按最近最少使用淘汰，已有条目以写入时间为初始值
+            self._conn.execute("ALTER TABLE avatars ADD COLUMN last_access REAL NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE avatars SET last_access = timestamp")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_avatars_last_access ON avatars (last_access)")
+        if version < 3:
+            # 缓存级别的设置（如存储布局）
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _sum_size(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM avatars").fetchone()[0]
+
+    def import_json_metadata(self, metadata_file: Path, cache_dir: Path) -> int:
+        """
+        从旧版 metadata.json 导入索引，导入后将其重命名为 metadata.json.migrated
+
+        旧元数据只记录写入时间，扩展名和文件大小通过一次目录扫描补全，文件已不存在的条目被丢弃。
+
+        Returns:
+            导入的条目数
+        """
+        try:
+            with open(metadata_file, "r", encoding="utf-8") as f:
+                metadata: Dict[str, float] = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"读取旧版头像缓存元数据失败: {e}")
+            return 0
+
+        files: Dict[str, IndexEntry] = {}
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                key, ext = os.path.splitext(entry.name)
+                if key in metadata and entry.is_file():
+                    files[key] = IndexEntry(float(metadata[key]), ext, entry.stat().st_size)
+
+        with self._lock:
+            self._write(files)
+            self._total_size = self._sum_size()
+        os.replace(metadata_file, metadata_file.with_name(metadata_file.name + ".migrated"))
+        return len(files)
+
+    def get(self, key: str) -> Optional[IndexEntry]:
+        """查询缓存键对应的条目"""
+        with self._lock:
+            return self._get_locked(key)
+
+    def _get_locked(self, key: str) -> Optional[IndexEntry]:
+        if key in self._pending:
+            return self._pending[key]
+        row = self._conn.execute(
+            "SELECT timestamp, ext, size FROM avatars WHERE key = ?", (key,)
+        ).fetchone()
+        return IndexEntry(*row) if row else None
+
+    def put(self, key: str, entry: IndexEntry):
+        """写入或更新条目（最后访问时间同时更新为写入时间）"""
+        with self._lock:
+            old = self._get_locked(key)
+            self._total_size += entry.size - (old.size if old else 0)
+            self._pending[key] = entry
+            with self._touch_lock:
+                self._touched.pop(key, None)
+            self._maybe_flush()
+
+    def delete(self, key: str):
+        """删除条目"""
+        with self._lock:
+            old = self._get_locked(key)
+            if old is not None:
+                self._total_size -= old.size
+            self._pending[key] = None
+            with self._touch_lock:
+                self._touched.pop(key, None)
+            self._maybe_flush()
+
+    def touch(self, key: str, access_time: float):
+        """记录访问时间（只记录在内存中，不触发写入）"""
+        with self._touch_lock:
+            self._touched[key] = access_time
+
+    def expire(self, before: float) -> List[RemovedEntry]:
+        """
+        在一个事务中删除写入时间早于指定时间的所有条目
+
+        Returns:
+            被删除的条目
+        """
+        with self._lock:
+            self._flush_locked()
+            with self._conn:
+                self._conn.execute("BEGIN")
+                rows = self._conn.execute(
+                    "SELECT key, ext, size FROM avatars WHERE timestamp < ?", (before,)
+                ).fetchall()
+                self._conn.execute("DELETE FROM avatars WHERE timestamp < ?", (before,))
+            self._total_size -= sum(size for _, _, size in rows)
+        return rows
+
+    def evict(self, max_bytes: int, target_bytes: Optional[int] = None) -> List[RemovedEntry]:
+        """
+        总大小超过限制时，按最后访问时间从旧到新删除条目，直到总大小不超过目标大小
+
+        只读取数据库挑选条目，删除与其他改动一样记录在内存中批量写入，不会为每次淘汰单独写入数据库。
+        有未写入改动或访问记录的条目是最近写入或访问的，不参与淘汰。
+
+        Args:
+            max_bytes: 总大小上限，未超过时不做任何操作
+            target_bytes: 淘汰后的目标大小，默认等于上限
+
+        Returns:
+            被删除的条目
+        """
+        with self._lock:
+            if self._total_size <= max_bytes:
+                return []
+            with self._touch_lock:
+                recent = set(self._touched)
+            excess = self._total_size - (max_bytes if target_bytes is None else target_bytes)
+            victims: List[RemovedEntry] = []
+            freed = 0
+            for row in self._conn.execute("SELECT key, ext, size FROM avatars ORDER BY last_access"):
+                if row[0] in self._pending or row[0] in recent:
+                    continue
+                victims.append(row)
+                freed += row[2]
+                if freed >= excess:
+                    break
+            for key, _, _ in victims:
+                self._pending[key] = None
+            self._total_size -= freed
+            self._maybe_flush()
+        return victims
+
+    def entries(self) -> List[Tuple[str, str]]:
+        """所有条目的 (缓存键, 扩展名)"""
+        with self._lock:
+            self._flush_locked()
+            return self._conn.execute("SELECT key, ext FROM avatars").fetchall()
+
+    def get_meta(self, name: str) -> Optional[str]:
+        """读取缓存级别的设置"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value: str):
+        """写入缓存级别的设置"""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    def count(self) -> int:
+        """条目数量"""
+        with self._lock:
+            self._flush_locked()
+            return self._conn.execute("SELECT COUNT(*) FROM avatars").fetchone()[0]
+
+    def total_size(self) -> int:
+        """所有缓存文件的总大小(字节)"""
+        return self._total_size
+
+    def clear(self):
+        """清空索引"""
+        with self._lock:
+            self._pending.clear()
+            with self._touch_lock:
+                self._touched.clear()
+            self._conn.execute("DELETE FROM avatars")
+            self._total_size = 0
+
+    def flush(self):
+        """立即写入未写入的改动"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """写入未写入的改动并关闭数据库"""
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
+
+    def _maybe_flush(self):
+        if len(self._pending) >= FLUSH_BATCH or time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        with self._touch_lock:
+            touched, self._touched = self._touched, {}
+        if self._pending or touched:
+            pending, self._pending = self._pending, {}
+            try:
+                self._write(pending, touched)
+            except sqlite3.Error as e:
+                logger.error(f"写入头像缓存索引失败: {e}")
+                self._restore_locked(pending, touched)
+        self._last_flush = time.monotonic()
+
+    def _restore_locked(self, pending: Dict[str, Optional[IndexEntry]], touched: Dict[str, float]):
+        """写入失败时放回未写入的改动，留待下一次批量写入，期间产生的更新的改动优先"""
+        newer = self._pending
+        pending.update(newer)
+        self._pending = pending
+        with self._touch_lock:
+            for key, access_time in touched.items():
+                # 之后重新写入或删除的条目以新的改动为准
+                if key not in newer and self._touched.get(key, 0) < access_time:
+                    self._touched[key] = access_time
+
+    def _write(self, changes: Dict[str, Optional[IndexEntry]], touched: Optional[Dict[str, float]] = None):
+        """在一个事务中写入一批改动和访问时间"""
+        upserts = [(key, *entry, entry.timestamp) for key, entry in changes.items() if entry is not None]
+        deletes = [(key,) for key, entry in changes.items() if entry is None]
+        with self._conn:
+            self._conn.execute("BEGIN")
+            if upserts:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO avatars (key, timestamp, ext, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                    upserts
+                )
+            if deletes:
+                self._conn.executemany("DELETE FROM avatars WHERE key = ?", deletes)
+            if touched:
+                self._conn.executemany(
+                    "UPDATE avatars SET last_access = ? WHERE key = ?",
+                    [(access_time, key) for key, access_time in touched.items()]
+                )
@@ -1,18 +1,27 @@
 import asyncio
 import time
-from typing import Optional
+from typing import Dict, Optional
 from astrbot.api import logger
 from .avatar_cache import AvatarCache
 
 
+# 定期写入头像缓存索引未写入改动的间隔(秒)
+INDEX_FLUSH_INTERVAL = 10
+
 class CacheManager:
-    """缓存管理器 - 负责定期清理过期缓存"""
+    """缓存管理器 - 负责定期清理过期缓存，并定期写入头像缓存索引的未写入改动"""
     
     def __init__(self, avatar_cache: AvatarCache, cleanup_interval_hours: int = 6):
         self.avatar_cache = avatar_cache
         self.cleanup_interval_hours = cleanup_interval_hours
         self.cleanup_task: Optional[asyncio.Task] = None
+        self.flush_task: Optional[asyncio.Task] = None
         self._running = False
+
+        # 清理统计信息
+        self.last_result: Dict[str, int] = {}
+        self.total_expired = 0
+        self.total_expired_bytes = 0
     
     async def start_cleanup_task(self):
         """启动定期清理任务"""
@@ -21,17 +30,19 @@ class CacheManager:
         
         self._running = True
         self.cleanup_task = asyncio.create_task(self._cleanup_loop())
+        self.flush_task = asyncio.create_task(self._flush_loop())
         logger.debug(f"缓存清理任务已启动，清理间隔: {self.cleanup_interval_hours}小时")
     
     async def stop_cleanup_task(self):
         """停止定期清理任务"""
         self._running = False
-        if self.cleanup_task and not self.cleanup_task.done():
-            self.cleanup_task.cancel()
-            try:
-                await self.cleanup_task
-            except asyncio.CancelledError:
-                pass
+        for task in (self.cleanup_task, self.flush_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
         logger.debug("缓存清理任务已停止")
     
     async def _cleanup_loop(self):
@@ -54,29 +65,42 @@ class CacheManager:
                 # 出错后等待一段时间再继续
                 await asyncio.sleep(300)  # 5分钟
     
+    async def _flush_loop(self):
+        """索引写入循环：改动只在后续改动时按间隔写入，缓存空闲时由这里写入，避免进程退出时丢失"""
+        while self._running:
+            try:
+                await asyncio.sleep(INDEX_FLUSH_INTERVAL)
+                await self.avatar_cache.flush_index_async()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"写入头像缓存索引时出错: {e}")
+
     async def cleanup_expired_cache(self):
-        """清理过期缓存"""
+        """清理过期缓存，并淘汰超出容量的缓存"""
         try:
             start_time = time.time()
-            
-            # 获取清理前的统计信息
-            stats_before = self.avatar_cache.get_cache_stats()
-            
-            # 清理过期缓存
-            self.avatar_cache.clear_expired_cache()
-            
-            # 获取清理后的统计信息
-            stats_after = self.avatar_cache.get_cache_stats()
-            
-            # 计算清理结果
-            cleaned_count = stats_before["total_cached"] - stats_after["total_cached"]
-            cleaned_size = stats_before["cache_size_bytes"] - stats_after["cache_size_bytes"]
+
+            # 批量清理过期缓存
+            expired_count, expired_size = await self.avatar_cache.clear_expired_cache_async()
+
+            # 按最后访问时间淘汰超出容量的缓存
+            evicted_count, evicted_size = await self.avatar_cache.enforce_size_limit_async()
+
             elapsed_time = time.time() - start_time
-            
-            if cleaned_count > 0:
+            self.last_result = {
+                "expired": expired_count,
+                "evicted": evicted_count,
+                "freed_bytes": expired_size + evicted_size,
+            }
+            self.total_expired += expired_count
+            self.total_expired_bytes += expired_size
+
+            if expired_count or evicted_count:
                 logger.info(
-                    f"缓存清理完成: 清理了 {cleaned_count} 个过期缓存文件, "
-                    f"释放了 {cleaned_size / 1024:.1f} KB 空间, "
+                    f"缓存清理完成: 清理了 {expired_count} 个过期缓存文件, "
+                    f"淘汰了 {evicted_count} 个超出容量的缓存文件, "
+                    f"释放了 {(expired_size + evicted_size) / 1024:.1f} KB 空间, "
                     f"耗时 {elapsed_time:.2f} 秒"
                 )
             else:
@@ -94,5 +118,10 @@ class CacheManager:
         return {
             "running": self._running,
             "cleanup_interval_hours": self.cleanup_interval_hours,
-            "task_status": "running" if self.cleanup_task and not self.cleanup_task.done() else "stopped"
+            "task_status": "running" if self.cleanup_task and not self.cleanup_task.done() else "stopped",
+            "last_result": dict(self.last_result),
+            "total_expired": self.total_expired,
+            # 淘汰数包括写入时触发的淘汰
+            "total_evicted": self.avatar_cache.disk_evictions,
+            "total_freed_bytes": self.total_expired_bytes + self.avatar_cache.disk_evicted_bytes,
         }
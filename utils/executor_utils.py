@@ -0,0 +1,93 @@
+"""线程池工具模块"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class InstrumentedExecutor:
+    """
+    带统计信息的专用线程池
+
+    用于将不同类型的阻塞任务（渲染、资源检查、列表绘制等）隔离到各自的线程池中，
+    避免它们在事件循环的默认线程池里互相争抢线程。
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        """
+        Args:
+            name: 线程池名称（同时作为线程名前缀）
+            max_workers: 最大线程数
+        """
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._created_at = time.monotonic()
+
+        # 统计信息
+        self._submitted = 0
+        self._started = 0
+        self._active = 0
+        self._completed = 0
+        self._busy_seconds = 0.0
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        在线程池中执行阻塞函数
+
+        Args:
+            func: 阻塞函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            函数返回值
+        """
+        call = functools.partial(func, *args, **kwargs)
+        with self._lock:
+            self._submitted += 1
+
+        def _instrumented():
+            start = time.monotonic()
+            with self._lock:
+                self._started += 1
+                self._active += 1
+            try:
+                return call()
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+                    self._busy_seconds += time.monotonic() - start
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _instrumented)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取线程池统计信息
+
+        Returns:
+            统计信息字典，utilization 为启动以来线程忙碌时间占总线程时间的比例
+        """
+        with self._lock:
+            elapsed = max(time.monotonic() - self._created_at, 1e-6)
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queued": self._submitted - self._started,
+                "completed": self._completed,
+                "busy_seconds": round(self._busy_seconds, 3),
+                "utilization": min(1.0, self._busy_seconds / (elapsed * self.max_workers)),
+            }
+
+    def shutdown(self):
+        """关闭线程池，取消尚未开始的任务"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
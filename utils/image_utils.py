@@ -1,42 +1,381 @@
 """图片处理工具模块"""
 
 import io
-from PIL import Image
+from functools import reduce
+from typing import List, Tuple
+from PIL import Image, ImageChops, ImageSequence, features
 from astrbot.api import logger
 
 
+# 按字节预算重新编码时的质量搜索范围
+MIN_ENCODE_QUALITY = 40
+MAX_ENCODE_QUALITY = 95
+
+# GIF 优化参数
+DEFAULT_GIF_FRAME_DURATION = 100   # 帧未声明时长时使用的默认值(毫秒)
+GIF_SIMILAR_TOLERANCE = 8          # 所有像素各通道(RGBA)差异都不超过该值的相邻帧视为重复帧
+GIF_PALETTE_STEPS = (128, 64, 32)  # 超出预算时依次尝试的调色板颜色数
+
+# 文件头签名 -> 图片格式
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"GIF87a", "GIF"),
+    (b"GIF89a", "GIF"),
+    (b"BM", "BMP"),
+    (b"II*\x00", "TIFF"),
+    (b"MM\x00*", "TIFF"),
+)
+# 识别文件格式需要的文件头长度
+SNIFF_BYTES = 12
+
+
 class ImageUtils:
     """图片处理工具类"""
 
     @staticmethod
-    def compress_image(image: bytes, max_size: int = 512) -> bytes | None:
+    def probe_image(image: bytes) -> Tuple[str, int, int] | None:
+        """
+        读取图片格式和尺寸（只解析文件头，不解码像素）
+
+        Args:
+            image: 图片字节数据
+
+        Returns:
+            (格式, 宽, 高)，无法识别时返回None
+        """
+        try:
+            with Image.open(io.BytesIO(image)) as img:
+                return img.format, img.width, img.height
+        except Exception:
+            return None
+
+    @staticmethod
+    def sniff_image_format(head: bytes) -> str | None:
+        """
+        根据文件头签名识别图片格式
+
+        Args:
+            head: 文件开头的字节数据（至少 SNIFF_BYTES 字节）
+
+        Returns:
+            图片格式，不是已知的图片格式时返回None
+        """
+        for signature, image_format in IMAGE_SIGNATURES:
+            if head.startswith(signature):
+                return image_format
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return "WEBP"
+        return None
+
+    @staticmethod
+    def compress_image(image: bytes, max_size: int = 512, target_bytes: int = 0) -> bytes | None:
         """
         压缩静态图片或GIF到max_size大小
-        
+
+        尺寸已在限制内且满足字节预算时直接返回原始数据，不重新编码。
+
         Args:
             image: 图片字节数据
             max_size: 最大尺寸
-            
+            target_bytes: 输出字节预算，为0时不限制；超出时依次尝试无损优化、降低质量和更换编码格式
+
         Returns:
             压缩后的图片字节数据，如果是GIF则返回None
         """
         try:
-            # 将输入的bytes加载为图片
+            # 将输入的bytes加载为图片（此时只解析文件头）
             img = Image.open(io.BytesIO(image))
-            output = io.BytesIO()
+            image_format = img.format
 
-            if img.format == "GIF":
+            if image_format == "GIF":
                 return None
+
+            over_budget = 0 < target_bytes < len(image)
+            if img.width <= max_size and img.height <= max_size and not over_budget:
+                # 无需缩放也满足预算，原样返回
+                return image
+
+            if img.width > max_size or img.height > max_size:
+                # 如果是静态图片，检查尺寸并压缩，保存处理后的图片到内存中的BytesIO对象
+                img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+                output = io.BytesIO()
+                img.save(output, format=image_format)
+                result = output.getvalue()
             else:
-                # 如果是静态图片，检查尺寸并压缩
-                if img.width > max_size or img.height > max_size:
-                    img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-                # 保存处理后的图片到内存中的BytesIO对象
-                img.save(output, format=img.format)
+                # 未缩放时以相同格式重新编码的结果与原图相近，直接以原图作为候选进入预算搜索
+                result = image
+
+            if 0 < target_bytes < len(result):
+                result = ImageUtils._encode_within_budget(img, result, target_bytes)
 
             # 返回处理后的图片数据（bytes）
-            return output.getvalue()
+            return result
 
         except Exception as e:
             logger.error(f"图片压缩失败: {e}")
             raise ValueError(f"图片压缩失败: {e}")
+
+    @staticmethod
+    def _encode(img: Image.Image, image_format: str, **params) -> bytes:
+        output = io.BytesIO()
+        img.save(output, format=image_format, **params)
+        return output.getvalue()
+
+    @staticmethod
+    def _search_quality(img: Image.Image, image_format: str, target_bytes: int) -> bytes | None:
+        """二分查找满足字节预算的最高编码质量，找不到时返回None"""
+        best = None
+        low, high = MIN_ENCODE_QUALITY, MAX_ENCODE_QUALITY
+        while low <= high:
+            quality = (low + high) // 2
+            data = ImageUtils._encode(img, image_format, quality=quality)
+            if len(data) <= target_bytes:
+                best = data
+                low = quality + 1
+            else:
+                high = quality - 1
+        return best
+
+    @staticmethod
+    def _encode_within_budget(img: Image.Image, encoded: bytes, target_bytes: int) -> bytes:
+        """
+        在字节预算内重新编码图片
+
+        依次尝试 PNG 无损优化、JPEG（仅不透明图片）、WebP，返回第一个满足预算的结果；
+        都无法满足时返回其中最小的结果。
+        """
+        candidates = [encoded]
+
+        if img.format == "PNG" or img.mode in ("RGBA", "LA", "P"):
+            data = ImageUtils._encode(img, "PNG", optimize=True)
+            if len(data) <= target_bytes:
+                return data
+            candidates.append(data)
+
+        has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+        lossy_formats = ["WEBP"] if has_alpha else ["JPEG", "WEBP"]
+        for image_format in lossy_formats:
+            if image_format == "WEBP" and not features.check("webp"):
+                continue
+            source = img
+            if image_format == "JPEG" and img.mode != "RGB":
+                source = img.convert("RGB")
+            elif image_format == "WEBP" and img.mode not in ("RGB", "RGBA"):
+                source = img.convert("RGBA" if has_alpha else "RGB")
+            data = ImageUtils._search_quality(source, image_format, target_bytes)
+            if data is not None:
+                return data
+            candidates.append(ImageUtils._encode(source, image_format, quality=MIN_ENCODE_QUALITY))
+
+        return min(candidates, key=len)
+
+    @staticmethod
+    def optimize_gif(image: bytes, max_size: int = 512, target_bytes: int = 0) -> bytes | None:
+        """
+        优化GIF动图：缩放帧尺寸、合并重复帧，超出字节预算时依次减少调色板颜色数和帧率
+
+        Args:
+            image: GIF字节数据
+            max_size: 最大尺寸
+            target_bytes: 输出字节预算，为0时不限制
+
+        Returns:
+            优化后的GIF字节数据，无需处理、不是GIF或结果不比原图小时返回None
+        """
+        try:
+            img = Image.open(io.BytesIO(image))
+            if img.format != "GIF":
+                return None
+
+            over_size = img.width > max_size or img.height > max_size
+            over_budget = 0 < target_bytes < len(image)
+            if not over_size and not over_budget:
+                return None
+
+            loop = img.info.get("loop", 0)
+            size = ImageUtils._fit_size(img.size, max_size)
+
+            # 解码并缩放所有帧，合并与上一帧（近似）相同的帧
+            frames: List[Image.Image] = []
+            durations: List[int] = []
+            for frame in ImageSequence.Iterator(img):
+                duration = ImageUtils._frame_duration(frame)
+                frame = ImageUtils._fit_frame(frame, size)
+                if frames and ImageUtils._frames_similar(frames[-1], frame):
+                    durations[-1] += duration
+                    continue
+                frames.append(frame)
+                durations.append(duration)
+
+            result = ImageUtils._encode_gif(frames, durations, loop)
+            if not target_bytes or len(result) <= target_bytes:
+                return ImageUtils._smaller_or_none(result, image)
+
+            # 超出预算：先减少调色板颜色数，再降低帧率
+            best = result
+            for colors in GIF_PALETTE_STEPS:
+                data = ImageUtils._encode_gif(frames, durations, loop, colors)
+                best = min(best, data, key=len)
+                if len(data) <= target_bytes:
+                    return data
+
+            while len(frames) > 1:
+                frames, durations = ImageUtils._halve_frame_rate(frames, durations)
+                data = ImageUtils._encode_gif(frames, durations, loop, GIF_PALETTE_STEPS[-1])
+                best = min(best, data, key=len)
+                if len(data) <= target_bytes:
+                    return data
+
+            return ImageUtils._smaller_or_none(best, image)
+
+        except Exception as e:
+            logger.error(f"GIF优化失败: {e}")
+            raise ValueError(f"GIF优化失败: {e}")
+
+    @staticmethod
+    def normalize_image(
+            image: bytes,
+            max_size: int = 1024,
+            max_pixels: int = 0,
+            max_frames: int = 0,
+            max_total_pixels: int = 0
+    ) -> bytes:
+        """
+        规范化输入图片：拒绝像素数过大的图片，缩放超出尺寸的图片，对帧数过多的动图均匀抽帧
+
+        只解析文件头即可判断无需处理的图片，直接返回原始数据。
+        动图按所有帧的像素总数（宽×高×帧数）判断，单帧不大但帧数很多的动图解码开销同样很大。
+
+        Args:
+            image: 图片字节数据
+            max_size: 最大边长
+            max_pixels: 最大像素数（宽×高），为0时不限制
+            max_frames: 动图最大帧数，为0时不限制
+            max_total_pixels: 动图所有帧的最大像素总数（宽×高×帧数），为0时不限制
+
+        Returns:
+            规范化后的图片字节数据
+
+        Raises:
+            ValueError: 无法识别、解码失败或超出像素数限制时抛出
+        """
+        try:
+            img = Image.open(io.BytesIO(image))
+        except Exception as e:
+            # 包括 PIL 自身检测到的解压炸弹
+            raise ValueError(f"无法识别的图片: {e}")
+
+        with img:
+            width, height = img.size
+            if max_pixels and width * height > max_pixels:
+                raise ValueError(f"图片像素数超出限制：{width}x{height}")
+
+            if img.format != "GIF" and not getattr(img, "is_animated", False):
+                return ImageUtils.compress_image(image, max_size) or image
+
+            try:
+                n_frames = getattr(img, "n_frames", 1)
+            except (OSError, Image.DecompressionBombError) as e:
+                raise ValueError(f"动图解析失败: {e}")
+            if max_total_pixels and width * height * n_frames > max_total_pixels:
+                raise ValueError(f"动图像素总数超出限制：{width}x{height}，{n_frames} 帧")
+
+            keep_frames = min(n_frames, max_frames) if max_frames else n_frames
+            if max(width, height) <= max_size and keep_frames == n_frames:
+                return image
+
+            # 逐帧解码，只保留抽中的帧，被跳过帧的时长合并到前一个保留帧
+            size = ImageUtils._fit_size(img.size, max_size)
+            frames: List[Image.Image] = []
+            durations: List[int] = []
+            try:
+                for index, frame in enumerate(ImageSequence.Iterator(img)):
+                    duration = ImageUtils._frame_duration(frame)
+                    if index * keep_frames // n_frames < len(frames):
+                        durations[-1] += duration
+                        continue
+                    frames.append(ImageUtils._fit_frame(frame, size))
+                    durations.append(duration)
+            except (OSError, Image.DecompressionBombError) as e:
+                # 截断或损坏的动图在解码到对应帧时才会出错
+                raise ValueError(f"动图解码失败: {e}")
+
+            return ImageUtils._encode_gif(frames, durations, img.info.get("loop", 0))
+
+    @staticmethod
+    def _fit_size(size: Tuple[int, int], max_size: int) -> Tuple[int, int]:
+        """按比例计算不超过最大边长的尺寸"""
+        width, height = size
+        if max(width, height) <= max_size:
+            return size
+        scale = max_size / max(width, height)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    @staticmethod
+    def _fit_frame(frame: Image.Image, size: Tuple[int, int]) -> Image.Image:
+        """将动图帧转换为RGBA并缩放到指定尺寸"""
+        frame = frame.convert("RGBA")
+        if frame.size != size:
+            frame = frame.resize(size, Image.Resampling.LANCZOS)
+        return frame
+
+    @staticmethod
+    def _frame_duration(frame: Image.Image) -> int:
+        return frame.info.get("duration", DEFAULT_GIF_FRAME_DURATION) or DEFAULT_GIF_FRAME_DURATION
+
+    @staticmethod
+    def _frames_similar(a: Image.Image, b: Image.Image) -> bool:
+        """
+        逐像素比较两帧（RGBA，原尺寸），所有像素各通道差异都不超过容差时视为重复帧
+
+        按单个像素的最大差异判断，小范围移动的元素或只有色相变化的帧不会被合并，
+        容差只吸收调色板量化带来的细微噪声。
+        """
+        diff = ImageChops.difference(a, b)
+        # 取各通道差异的最大值，再找出超出容差的像素
+        max_diff = reduce(ImageChops.lighter, diff.split())
+        return max_diff.point(lambda v: 255 if v > GIF_SIMILAR_TOLERANCE else 0).getbbox() is None
+
+    @staticmethod
+    def _halve_frame_rate(frames: List[Image.Image], durations: List[int]) -> Tuple[List[Image.Image], List[int]]:
+        """每两帧保留一帧，时长合并到保留的帧上"""
+        kept_frames = frames[::2]
+        kept_durations = [sum(durations[i:i + 2]) for i in range(0, len(durations), 2)]
+        return kept_frames, kept_durations
+
+    @staticmethod
+    def _encode_gif(frames: List[Image.Image], durations: List[int], loop: int, colors: int = 0) -> bytes:
+        """
+        编码GIF，colors 不为0时将每帧量化到指定颜色数
+
+        只有帧中存在透明像素时才使用 disposal=2（显示下一帧前清除为背景），避免上一帧透过透明区域残留；
+        不透明的帧使用默认处理方式，编码器只写入与上一帧不同的区域，体积小得多。
+        """
+        params = {"disposal": 2} if any(ImageUtils._has_transparency(frame) for frame in frames) else {}
+        if colors:
+            frames = [frame.quantize(colors=colors, method=Image.Quantize.FASTOCTREE) for frame in frames]
+        output = io.BytesIO()
+        frames[0].save(
+            output,
+            format="GIF",
+            save_all=True,
+            append_images=frames[1:],
+            duration=durations,
+            loop=loop,
+            optimize=True,
+            **params,
+        )
+        return output.getvalue()
+
+    @staticmethod
+    def _smaller_or_none(result: bytes, original: bytes) -> bytes | None:
+        """重新编码的结果不比原图小时返回None，由调用方使用原图"""
+        return result if len(result) < len(original) else None
+
+    @staticmethod
+    def _has_transparency(frame: Image.Image) -> bool:
+        """帧中是否存在（部分）透明的像素"""
+        if frame.mode == "RGBA":
+            return frame.getchannel("A").getextrema()[0] < 255
+        return frame.mode in ("LA", "PA") or "transparency" in frame.info
@@ -1,17 +1,102 @@
 """网络请求工具模块"""
 
+import asyncio
 import random
 import aiohttp
 from typing import Optional
 from astrbot.api import logger
 from .avatar_cache import AvatarCache
+from .image_utils import ImageUtils, SNIFF_BYTES
+from .single_flight import SingleFlight
+
+
+# DNS 解析结果缓存时间(秒)
+DNS_CACHE_TTL = 300
+# 空闲连接保持时间(秒)
+KEEPALIVE_TIMEOUT = 30
+# 流式下载的分块大小
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# 未声明具体图片类型时允许的 Content-Type
+GENERIC_CONTENT_TYPES = ("application/octet-stream", "binary/octet-stream")
 
 
 class NetworkUtils:
-    """网络请求工具类"""
+    """
+    网络请求工具类
+
+    所有请求共用一个延迟创建的 ClientSession，复用连接池（keep-alive）和 DNS 缓存，
+    避免每次下载头像或图片都重新建立 TCP/TLS 连接。插件卸载时需调用 close 释放。
+    """
 
-    def __init__(self, avatar_cache: Optional[AvatarCache] = None):
+    def __init__(
+            self,
+            avatar_cache: Optional[AvatarCache] = None,
+            connect_timeout: float = 5,
+            request_timeout: float = 15,
+            limit_per_host: int = 8,
+            max_download_bytes: int = 0
+    ):
+        """
+        Args:
+            avatar_cache: 头像缓存
+            connect_timeout: 建立连接超时时间(秒)
+            request_timeout: 单次请求总超时时间(秒)，包括读取响应体
+            limit_per_host: 同一主机的最大并发连接数
+            max_download_bytes: 单个文件的最大下载字节数，为0时不限制
+        """
         self.avatar_cache = avatar_cache
+        self.max_download_bytes = max(0, max_download_bytes)
+        self.timeout = aiohttp.ClientTimeout(total=request_timeout, connect=connect_timeout)
+        self.limit_per_host = max(1, limit_per_host)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.avatar_flight = SingleFlight()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享会话，首次使用或已关闭时创建"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def close(self):
+        """关闭共享会话"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _read_image(self, response: aiohttp.ClientResponse) -> bytes:
+        """
+        流式读取图片响应体
+
+        响应类型不是图片、声明或实际大小超出限制、文件头不是已知图片格式时立即中止，不读取剩余数据。
+
+        Raises:
+            ValueError: 响应不是图片或超出大小限制时抛出
+        """
+        content_type = response.content_type
+        if not content_type.startswith("image/") and content_type not in GENERIC_CONTENT_TYPES:
+            raise ValueError(f"响应类型不是图片: {content_type}")
+        limit = self.max_download_bytes
+        if limit and response.content_length and response.content_length > limit:
+            raise ValueError(f"文件过大: {response.content_length} 字节")
+
+        buffer = bytearray()
+        sniffed = False
+        async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+            buffer += chunk
+            if limit and len(buffer) > limit:
+                raise ValueError(f"文件超过 {limit} 字节")
+            if not sniffed and len(buffer) >= SNIFF_BYTES:
+                if ImageUtils.sniff_image_format(bytes(buffer[:SNIFF_BYTES])) is None:
+                    raise ValueError("文件头不是已知的图片格式")
+                sniffed = True
+        if not sniffed and ImageUtils.sniff_image_format(bytes(buffer)) is None:
+            raise ValueError("文件头不是已知的图片格式")
+        return bytes(buffer)
 
     async def download_image(self, url: str) -> bytes | None:
         """
@@ -25,10 +110,13 @@ class NetworkUtils:
         """
         url = url.replace("https://", "http://")
         try:
-            async with aiohttp.ClientSession() as client:
-                response = await client.get(url)
-                img_bytes = await response.read()
+            async with self._get_session().get(url) as response:
+                response.raise_for_status()
+                img_bytes = await self._read_image(response)
                 return img_bytes
+        except asyncio.TimeoutError:
+            logger.error(f"图片下载超时({self.timeout.total}秒)")
+            return None
         except Exception as e:
             logger.error(f"图片下载失败: {e}")
             return None
@@ -45,26 +133,33 @@ class NetworkUtils:
         """
         # 先尝试从缓存获取
         if self.avatar_cache:
-            cached_avatar = self.avatar_cache.get_avatar(user_id)
+            cached_avatar = await self.avatar_cache.get_avatar_async(user_id)
             if cached_avatar:
                 return cached_avatar
 
+        # 同一用户的并发请求共享一次下载，结果只写入缓存一次
+        return await self.avatar_flight.do(user_id, lambda: self._download_avatar(user_id))
+
+    async def _download_avatar(self, user_id: str) -> bytes | None:
+        """下载用户头像并写入缓存"""
         # 如果user_id不是数字，生成随机数字ID
         if not user_id.isdigit():
             user_id = "".join(random.choices("0123456789", k=9))
 
         avatar_url = f"https://q4.qlogo.cn/headimg_dl?dst_uin={user_id}&spec=640"
         try:
-            async with aiohttp.ClientSession() as client:
-                response = await client.get(avatar_url, timeout=10)
+            async with self._get_session().get(avatar_url) as response:
                 response.raise_for_status()
-                avatar_data = await response.read()
+                avatar_data = await self._read_image(response)
 
-                # 缓存头像数据
+                # 缓存头像数据（后台写入磁盘）
                 if self.avatar_cache and avatar_data:
-                    self.avatar_cache.set_avatar(user_id, avatar_data)
+                    await self.avatar_cache.set_avatar_async(user_id, avatar_data)
 
                 return avatar_data
+        except asyncio.TimeoutError:
+            logger.error(f"下载头像超时({self.timeout.total}秒)")
+            return None
         except Exception as e:
             logger.error(f"下载头像失败: {e}")
             return None
@@ -0,0 +1,222 @@
+"""生成结果缓存模块"""
+
+import asyncio
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from astrbot.api import logger
+
+from .executor_utils import InstrumentedExecutor
+
+
+class ResultCache:
+    """
+    表情包生成结果缓存（内容寻址）
+
+    键为请求摘要（模板、输入图片哈希、文本、选项、输出设置），值为最终发送的图片字节数据。
+    内存层为按字节预算淘汰的 LRU；可选的磁盘层存放在插件数据目录下，超出容量时淘汰最久未使用的文件。
+    磁盘读写都在线程池中进行，写入在后台完成，不延迟回复。
+    """
+
+    def __init__(
+            self,
+            memory_bytes: int,
+            cache_dir: Optional[str] = None,
+            disk_bytes: int = 0,
+            executor: Optional[InstrumentedExecutor] = None
+    ):
+        """
+        Args:
+            memory_bytes: 内存层容量(字节)，为0时不使用内存层
+            cache_dir: 磁盘层目录
+            disk_bytes: 磁盘层容量(字节)，为0时不使用磁盘层
+            executor: 磁盘读写使用的线程池，未指定时使用事件循环默认线程池
+        """
+        self.memory_bytes = max(0, memory_bytes)
+        self.disk_bytes = max(0, disk_bytes) if cache_dir else 0
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._executor = executor
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        # 磁盘层索引：键 -> 文件大小，按最近使用顺序排列
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_size = 0
+        self._disk_loaded = False
+        self._pending: Set[asyncio.Task] = set()
+
+        # 统计信息
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def disk_enabled(self) -> bool:
+        return self.disk_bytes > 0
+
+    async def _run(self, func, *args):
+        if self._executor:
+            return await self._executor.run(func, *args)
+        return await asyncio.to_thread(func, *args)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.bin"
+
+    async def load(self):
+        """扫描磁盘层目录，重建索引"""
+        if not self.disk_enabled or self._disk_loaded:
+            return
+        try:
+            entries = await self._run(self._scan_disk)
+        except OSError as e:
+            logger.warning(f"加载表情包结果缓存失败: {e}")
+            entries = []
+
+        for key, size in entries:
+            if key not in self._disk:
+                self._disk[key] = size
+                self._disk_size += size
+        self._disk_loaded = True
+        await self._evict_disk()
+
+    def _scan_disk(self) -> List[Tuple[str, int]]:
+        """扫描磁盘缓存文件，按修改时间从旧到新返回 (键, 大小)"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".bin") and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        entries.sort()
+        return [(key, size) for _, key, size in entries]
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        查询缓存
+
+        Args:
+            key: 请求摘要
+
+        Returns:
+            缓存的图片字节数据，未命中返回None
+        """
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return data
+
+        if key in self._disk:
+            try:
+                data = await self._run(self._path(key).read_bytes)
+            except OSError:
+                data = None
+            if data is not None and key in self._disk:
+                self._disk.move_to_end(key)
+                self.disk_hits += 1
+                self._put_memory(key, data)
+                return data
+            self._drop_disk_entry(key)
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, data: bytes):
+        """
+        写入缓存，磁盘层在后台写入
+
+        Args:
+            key: 请求摘要
+            data: 图片字节数据
+        """
+        self._put_memory(key, data)
+        if self.disk_enabled and self._disk_loaded and key not in self._disk and len(data) <= self.disk_bytes:
+            task = asyncio.create_task(self._write_disk(key, data))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    def _put_memory(self, key: str, data: bytes):
+        """写入内存层并按字节预算淘汰"""
+        size = len(data)
+        if size > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= len(old)
+        self._memory[key] = data
+        self._memory_size += size
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+            self.evictions += 1
+
+    async def _write_disk(self, key: str, data: bytes):
+        """写入磁盘层并按容量淘汰"""
+        try:
+            await self._run(self._write_file, self._path(key), data)
+        except OSError as e:
+            logger.warning(f"写入表情包结果缓存失败: {e}")
+            return
+        if key not in self._disk:
+            self._disk[key] = len(data)
+            self._disk_size += len(data)
+        await self._evict_disk()
+
+    @staticmethod
+    def _write_file(path: Path, data: bytes):
+        """先写临时文件再替换，避免读到写了一半的文件"""
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    async def _evict_disk(self):
+        """淘汰最久未使用的磁盘缓存直到不超过容量"""
+        victims = []
+        while self._disk_size > self.disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_size -= size
+            victims.append(self._path(key))
+            self.evictions += 1
+        if victims:
+            await self._run(self._unlink_files, victims)
+
+    @staticmethod
+    def _unlink_files(paths: List[Path]):
+        for path in paths:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def _drop_disk_entry(self, key: str):
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_size -= size
+
+    async def close(self):
+        """等待后台写入完成"""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "memory_items": len(self._memory),
+            "memory_bytes": self._memory_size,
+            "memory_limit": self.memory_bytes,
+            "disk_enabled": self.disk_enabled,
+            "disk_items": len(self._disk),
+            "disk_bytes": self._disk_size,
+            "disk_limit": self.disk_bytes,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": hits / total if total else 0.0,
+        }
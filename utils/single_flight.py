@@ -0,0 +1,68 @@
+"""并发请求合并工具模块"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    相同键的并发调用合并器
+
+    同一时刻相同键只执行一次，其余调用方等待并共享同一结果（或异常）。
+    任务完成后立即移除，之后的调用会重新执行。
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+        # 统计信息
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行或加入相同键的调用
+
+        Args:
+            key: 合并键
+            func: 无参协程函数，仅在没有相同键的调用进行中时执行
+
+        Returns:
+            调用结果
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda t, k=key: self._finish(k, t))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+        # 单个调用方被取消（如超时）不会取消共享的任务
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        """任务完成后移除，并标记异常已读取，避免无人等待时输出警告"""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
+
+    def __contains__(self, key: Hashable) -> bool:
+        """相同键的调用是否进行中"""
+        return key in self._calls
+
+    @property
+    def inflight(self) -> int:
+        """进行中的调用数"""
+        return len(self._calls)
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取统计信息"""
+        return {
+            "inflight": len(self._calls),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+        }